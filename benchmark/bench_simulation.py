@@ -0,0 +1,171 @@
+"""
+仿真引擎的性能基准
+
+用法(在仓库根目录下)：
+    python -m benchmark.bench_simulation --preset quick --output bench.json
+    python -m benchmark.bench_simulation --preset quick --baseline bench.json --tolerance 0.2
+
+每个用例在独立的子进程中运行，以便准确得到峰值内存(ru_maxrss)。
+每个用例重复 --repeat 次，各指标取最好的一次(与 timeit 相同，噪声只会使计时变差)。
+指定 --baseline 时与基线比较，只检查吞吐量、总耗时与峰值内存；各阶段耗时只作记录，
+耗时低于 MIN_TIME 的用例计时噪声过大，也不参与比较。任一检查项退化超过容差即以非零状态退出。
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+
+# 吞吐量类指标越大越好，其余(耗时、内存)越小越好
+HIGHER_IS_BETTER = ("events_per_second", "customers_per_second")
+# 与基线比较的指标，其余指标(各阶段耗时)只作记录
+GATED = ("total_time", "customers_per_second", "events_per_second", "peak_rss_mb")
+# 总耗时低于该值(秒)时计时指标不参与比较：更短的用例中计时噪声可达数十个百分点
+MIN_TIME = 0.5
+
+# 用例：(引擎, 顾客人数, 服务窗口数量, 队列最大长度, 负载 rho)
+# quick 中每个用例约耗时 1 秒，均超过 MIN_TIME，因此都参与计时比较
+PRESETS = {
+    "quick": [
+        ("event", 10 ** 5, 1, 50, 0.9),
+        ("event", 10 ** 5, 16, 50, 0.9),
+        ("fast", 4 * 10 ** 6, 1, 50, 0.9),
+        ("fast", 2 * 10 ** 6, 4, 50, 0.9),
+        ("stream", 10 ** 5, 4, 50, 0.9),
+    ],
+    "full": (
+        [("event", n, 1, 50, 0.9) for n in (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)] +
+        [("fast", n, 1, 50, 0.9) for n in (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7)] +
+        [("event", 10 ** 5, c, 50, 0.9) for c in (1, 4, 16, 64, 256)] +
+        [("fast", 10 ** 6, c, 50, 0.9) for c in (1, 4, 16, 64, 256)] +
+        [("event", 10 ** 5, 1, k, 0.9) for k in (0, 10, 100, 1000)] +
+        [("event", 10 ** 5, 4, 50, rho) for rho in (0.5, 0.7, 0.9, 0.95, 0.99)] +
+        [("fast", 10 ** 6, 1, 1000, rho) for rho in (0.5, 0.7, 0.9, 0.95, 0.99)] +
+        [("stream", 10 ** 6, 4, 50, 0.9)]
+    ),
+}
+
+
+def case_name(case):
+    engine, customers, windows, max_queue, rho = case
+    return "{}-n{}-c{}-k{}-rho{}".format(engine, customers, windows, max_queue, rho)
+
+
+def run_case(case, seed=1):
+    """
+    在当前进程中运行一个用例
+    :return: 指标字典
+    """
+    from main.instrument import Instrument
+    from main.preprocess import Global
+    engine, customers, windows, max_queue, rho = case
+    g = Global()
+    g.instrument = Instrument()
+    g.initial_parameters(mean_arrive=1.0, mean_serve=rho * windows, num_custom=customers, max_queue=max_queue,
+                         num_service=windows, seed=seed, streaming=(engine == "stream"))
+    start = time.perf_counter()
+    g.run("fast" if engine == "fast" else "event")
+    elapsed = time.perf_counter() - start
+    result = {
+        "total_time": elapsed,
+        "customers_per_second": customers / elapsed,
+    }
+    if engine != "fast":
+        result["events_per_second"] = g.instrument.events_per_second()
+        result["generate_time"] = g.instrument.phase_time["generate"]
+        result["simulate_time"] = g.instrument.phase_time["simulate"]
+        result["report_print_time"] = g.instrument.phase_time["report"]
+    if engine == "event":
+        # 报表路径：时间平均曲线
+        start = time.perf_counter()
+        times = np.arange(1, int(g.timer.get_time()))
+        g.wait_queue.build_index().average(times)
+        for service in g.service_list:
+            service.build_index().average(times)
+        result["curves_time"] = time.perf_counter() - start
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+def run_isolated(case, repeat=1):
+    """
+    在独立的子进程中运行用例，使峰值内存互不影响；重复 repeat 次，各指标取最好的一次
+    """
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        with context.Pool(1, maxtasksperchild=1) as pool:
+            runs.append(pool.apply(run_case, (case,)))
+    return {metric: (max if metric in HIGHER_IS_BETTER else min)(run[metric] for run in runs) for metric in runs[0]}
+
+
+def compare(results, baseline, tolerance):
+    """
+    与基线比较
+    :return: 退化项的描述列表
+    """
+    regressions = []
+    for name, metrics in results["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            continue
+        # 用例过短时计时主要是噪声，只比较内存
+        timed = min(base.get("total_time", 0), metrics.get("total_time", 0)) >= MIN_TIME
+        for metric, value in metrics.items():
+            if metric not in GATED or metric not in base or base[metric] <= 0:
+                continue
+            if metric != "peak_rss_mb" and not timed:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                change = (base[metric] - value) / base[metric]
+            else:
+                change = (value - base[metric]) / base[metric]
+            if change > tolerance:
+                regressions.append("{} {}: {:.4g} -> {:.4g} ({:+.0%})".format(name, metric, base[metric], value,
+                                                                              change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the queue simulation engines.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--filter", default=None, help="only run cases whose name contains this string")
+    parser.add_argument("--output", default=None, help="write results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="compare against this JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case, the best run of each metric is kept")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in PRESETS[args.preset] if args.filter is None or args.filter in case_name(case)]
+    results = {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                 "preset": args.preset, "repeat": args.repeat},
+        "cases": {},
+    }
+    for case in cases:
+        name = case_name(case)
+        results["cases"][name] = metrics = run_isolated(case, args.repeat)
+        print("{:<36} {:>10.3f}s {:>12.0f} customers/s {:>8.1f} MB".format(
+            name, metrics["total_time"], metrics["customers_per_second"], metrics["peak_rss_mb"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print("[REGRESSION] " + line)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+import heapq
+
+
+class FutureEventList:
+    """
+    未来事件表(FEL)，基于 heapq 的无锁二叉堆
+    事件以紧凑元组 (time, seq, kind, object) 存储：
+    kind 为 event.events 中的整数事件类型，seq 为单调递增的序号，保证同一时刻的事件按加入顺序先进先出，
+    同时避免元组比较落到 object 上。
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.seq = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def empty(self):
+        return not self.heap
+
+    def push(self, time, kind, object_):
+        heapq.heappush(self.heap, (time, self.seq, kind, object_))
+        self.seq += 1
+
+    def pop(self):
+        """
+        取出最早发生的事件
+        :return: (time, seq, kind, object)
+        """
+        return heapq.heappop(self.heap)
+
+    def peek_time(self):
+        return self.heap[0][0] if self.heap else None
+
+    def clear(self):
+        self.heap.clear()
+        self.seq = 0
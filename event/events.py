@@ -1,3 +1,9 @@
+# 事件类型，使用整数编码以减少主循环中的字符串比较
+ARRIVE = 0
+FINISH = 1
+EVENT_NAMES = {ARRIVE: "ARRIVE", FINISH: "FINISH"}
+
+
 class Event:
     """
     本任务中的事件基类，均与顾客有关系
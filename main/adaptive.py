@@ -0,0 +1,69 @@
+import numpy as np
+
+from main.replication import confidence_interval
+from main.sweep import SweepExecutor
+
+
+def interval_scores(values, half_widths, gaps):
+    """
+    相邻已仿真参数点之间区间的细分优先级：各指标的变化量与两端置信半宽之和，按该指标的取值范围归一化后相加，
+    再乘以区间的相对宽度。曲线变化剧烈(如接近饱和处)或结果不够确定的宽区间优先细分；
+    乘以宽度使噪声较大的区域不会被无限细分
+    :param values: 形状为 (n, m) 的各点指标均值，按参数取值排序
+    :param half_widths: 同形状的置信半宽，无法估计时为 inf
+    :param gaps: 长度为 n - 1 的区间相对宽度
+    :return: 长度为 n - 1 的区间得分
+    """
+    spread = np.nanmax(values, axis=0) - np.nanmin(values, axis=0)
+    spread = np.where(spread > 0, spread, 1.0)
+    change = np.abs(np.diff(values, axis=0))
+    widths = np.where(np.isfinite(half_widths), half_widths, 0.0)
+    uncertainty = widths[:-1] + widths[1:]
+    return np.nansum((change + uncertainty) / spread, axis=1) * gaps
+
+
+def adaptive_sweep(candidates, make_params, budget, initial=5, engine="event", workers=1, seed=None,
+                   replications=2, crn=False, cache=None, level=0.95, point=0, batch=4):
+    """
+    自适应扫描：先在候选取值中均匀取 initial 个点仿真，之后每轮二分得分最高的区间(见 interval_scores)，
+    直到仿真次数达到预算或所有区间都不可再分。
+    第 k 个候选取值使用参数点编号 point + k 派生随机数流，细分顺序也与进程数量无关，因此结果与进程数量无关。
+    :param candidates: 按大小排列的候选参数取值，如 service_mean_list
+    :param make_params: 将参数取值转换为 initial_parameters 参数字典的函数
+    :param budget: 仿真次数上限(每个参数点计 replications 次)
+    :param initial: 初始粗网格的点数
+    :param replications: 每个参数点的重复次数，不少于 2 时置信半宽参与细分得分
+    :param point: 参数点编号的起点，同一 seed 下的多条曲线应使用不同的起点
+    :param batch: 每轮细分的区间数量，这些参数点一起提交给进程池
+    :return: (已仿真的参数取值列表, 形状为 (n, 2) 的指标均值, 形状为 (n, 2) 的置信半宽)，按参数取值排序
+    """
+    candidates = list(candidates)
+    executor = SweepExecutor(workers=workers, seed=seed, engine=engine, crn=crn, cache=cache)
+    limit = max(budget // replications, min(initial, len(candidates)))
+    evaluated = {}  # 候选序号 -> (均值, 半宽)
+
+    def evaluate(indices):
+        values = executor.collect([make_params(candidates[k]) for k in indices], replications,
+                                  ids=[point + k for k in indices])
+        for k, value in zip(indices, values):
+            intervals = [confidence_interval(value[:, m], level) for m in range(value.shape[1])]
+            evaluated[k] = np.array([mean for (mean, _) in intervals]), np.array([hw for (_, hw) in intervals])
+
+    evaluate(sorted(set(np.linspace(0, len(candidates) - 1, min(initial, len(candidates))).round().astype(int))))
+    while len(evaluated) < limit:
+        order = sorted(evaluated)
+        values = np.array([evaluated[k][0] for k in order])
+        half_widths = np.array([evaluated[k][1] for k in order])
+        scores = interval_scores(values, half_widths, np.diff(order) / (len(candidates) - 1))
+        # 相邻候选之间没有可插入的取值时区间不可再分
+        splittable = np.diff(order) > 1
+        scores = np.where(splittable, scores, -np.inf)
+        best = [i for i in np.argsort(-scores, kind="stable")[:min(batch, limit - len(evaluated))]
+                if splittable[i]]
+        if not best:
+            break
+        evaluate([(order[i] + order[i + 1]) // 2 for i in best])
+
+    order = sorted(evaluated)
+    return ([candidates[k] for k in order], np.array([evaluated[k][0] for k in order]),
+            np.array([evaluated[k][1] for k in order]))
@@ -0,0 +1,97 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+
+def system_capacity(num_service, max_queue):
+    """
+    与 Global.simulate 的溢出规则对应的系统容量 K：所有窗口均忙且等待队列长度 > max_queue 时顾客离开，
+    因此等待队列最多 max_queue + 1 人
+    """
+    return num_service + max(max_queue + 1, 0)
+
+
+@lru_cache(maxsize=4096)
+def mmck(mean_arrive, mean_serve, num_service, max_queue):
+    """
+    M/M/c/K 排队系统的稳态指标，按参数元组缓存
+    :param mean_arrive: 到达间隔的均值
+    :param mean_serve: 服务时长的均值
+    :param num_service: 服务窗口数量 c
+    :param max_queue: 队列最大长度(系统容量见 system_capacity)
+    :return: 字典 {"overflow": 顾客因队列溢出离开的概率, "sojourn": 被服务顾客的平均逗留时间,
+                  "wait": 平均等待时间, "wait_prob": 被服务顾客需要等待的概率, "queue_length": 平均队列长度,
+                  "system_length": 系统内平均人数, "usage": 窗口平均利用率}
+    """
+    lam = 1.0 / mean_arrive
+    mu = 1.0 / mean_serve
+    c = num_service
+    capacity = system_capacity(c, max_queue)
+    n = np.arange(capacity + 1)
+    # 生灭过程：p_n / p_{n-1} = lam / (min(n, c) mu)，在对数空间中累加以避免溢出
+    log_ratio = np.log(lam) - np.log(np.minimum(n[1:], c) * mu)
+    log_p = np.concatenate(([0.0], np.cumsum(log_ratio)))
+    p = np.exp(log_p - log_p.max())
+    p /= p.sum()
+    overflow = p[-1]  # PASTA：到达的顾客看到系统已满的概率
+    lam_eff = lam * (1 - overflow)
+    system_length = (n * p).sum()
+    queue_length = (np.maximum(n - c, 0) * p).sum()
+    # 被接纳的顾客看到所有窗口均忙的概率
+    wait_prob = p[c:capacity].sum() / (1 - overflow)
+    return {
+        "overflow": float(overflow),
+        "sojourn": float(system_length / lam_eff),
+        "wait": float(queue_length / lam_eff),
+        "wait_prob": float(wait_prob),
+        "queue_length": float(queue_length),
+        "system_length": float(system_length),
+        "usage": float(lam_eff / (c * mu)),
+    }
+
+
+@lru_cache(maxsize=4096)
+def erlang_c(num_service, offered_load):
+    """
+    Erlang C 公式：无限队列 M/M/c 中到达的顾客需要等待的概率
+    :param offered_load: 负载 a = lam / mu，要求 a < c
+    """
+    c = num_service
+    a = offered_load
+    if a >= c:
+        return 1.0
+    # 以 Erlang B 的递推计算，数值稳定
+    b = 1.0
+    for k in range(1, c + 1):
+        b = a * b / (k + a * b)
+    rho = a / c
+    return b / (1 - rho + rho * b)
+
+
+def mmc_sojourn(mean_arrive, mean_serve, num_service):
+    """
+    无限队列 M/M/c 的平均逗留时间
+    """
+    a = mean_serve / mean_arrive
+    if a >= num_service:
+        return math.inf
+    return erlang_c(num_service, a) * mean_serve / (num_service - a) + mean_serve
+
+
+def control_variate(y, x, x_mean):
+    """
+    控制变量法：以已知期望的统计量 x (如观测到的平均服务时长)修正 y 的估计，
+    y_cv = y - beta (x - E[x])，beta 为 y 对 x 的最小二乘回归系数
+    :param y: 各次重复(或各批)的目标统计量，形状 (n,)
+    :param x: 对应的控制变量，形状 (n,) 或 (n, m)
+    :param x_mean: 控制变量的已知期望，标量或长度为 m 的数组
+    :return: (修正后的样本, 方差缩减比例 var(y_cv) / var(y))
+    """
+    y = np.asarray(y, dtype=float)
+    x = np.asarray(x, dtype=float).reshape(len(y), -1)
+    centered = x - x.mean(axis=0)
+    beta = np.linalg.lstsq(centered, y - y.mean(), rcond=None)[0]
+    adjusted = y - (x - np.asarray(x_mean, dtype=float)) @ beta
+    ratio = adjusted.var(ddof=1) / y.var(ddof=1) if len(y) > 1 and y.var() > 0 else 1.0
+    return adjusted, ratio
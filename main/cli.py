@@ -0,0 +1,154 @@
+"""
+无界面的批量仿真入口
+
+用法(在仓库根目录下)：
+    python -m main.cli scenario.json
+    python -m main.cli sweep.yaml --workers 4 --format csv --output result.csv
+    python -m main.cli scenario.json --report report.png
+
+场景描述为 JSON (或安装了 PyYAML 时的 YAML)：
+    {
+        "engine": "fast",                       # 仿真引擎，见 Global.run
+        "seed": 1,                              # 根随机种子，省略时随机生成并在结果中给出
+        "replications": 4,                      # 每个参数点的重复次数
+        "workers": 1,                           # 进程数量
+        "crn": false,                           # 公共随机数模式
+        "cache": "results/",                    # 结果缓存目录，可省略
+        "params": {"mean_arrive": 50, "num_custom": 10000, "serve_dist": {"type": "erlang", "k": 3}},
+        "sweep": {"mean_serve": [80, 90, 100], "num_service": [1, 2]},
+        "report": "report.png"                  # 报告图，只适用于单个参数点
+    }
+params 为各参数点共同的 initial_parameters 参数；sweep 中各参数取值的笛卡尔积构成参数点，
+也可以用 "points": [{...}, ...] 直接列出参数点。只有指定报告图时才会导入 matplotlib。
+"""
+import argparse
+import csv
+import itertools
+import json
+import sys
+
+import numpy as np
+
+from main.replication import confidence_interval
+from main.sweep import SweepExecutor
+
+
+def load_spec(path):
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit("PyYAML is required for YAML specs, use JSON instead.")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def expand_points(spec):
+    """
+    :return: initial_parameters 参数字典的列表
+    """
+    base = dict(spec.get("params", {}))
+    if "points" in spec:
+        return [dict(base, **point) for point in spec["points"]]
+    grid = spec.get("sweep", {})
+    names = list(grid)
+    return [dict(base, **dict(zip(names, values))) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_spec(spec):
+    """
+    按场景描述执行仿真
+    :return: 字典 {"engine", "seed", "replications", "points": [参数与结果]}
+    """
+    points = expand_points(spec)
+    engine = spec.get("engine", "event")
+    replications = spec.get("replications", 1)
+    cache = None
+    if spec.get("cache"):
+        from main.result_cache import ResultCache
+        cache = ResultCache(spec["cache"])
+    executor = SweepExecutor(workers=spec.get("workers", 1), seed=spec.get("seed"), engine=engine,
+                             crn=spec.get("crn", False), cache=cache)
+    values = executor.collect(points, replications)
+    rows = []
+    for params, value in zip(points, values):
+        sojourn, sojourn_hw = confidence_interval(value[:, 0])
+        overflow, overflow_hw = confidence_interval(value[:, 1])
+        row = dict(params, sojourn=sojourn, overflow=overflow)
+        if replications > 1:
+            row.update(sojourn_half_width=sojourn_hw, overflow_half_width=overflow_hw)
+        rows.append({name: clean(x) for name, x in row.items()})
+    if spec.get("report"):
+        if len(points) != 1:
+            raise SystemExit("A report can only be drawn for a single scenario.")
+        report(points[0], executor.job_seed(0, 0), engine, spec["report"])
+    return {"engine": engine, "seed": str(executor.seed_sequence.entropy), "replications": replications,
+            "points": rows}
+
+
+def report(params, seed, engine, path):
+    """
+    重新仿真第一次重复并画出报告图
+    """
+    from main.preprocess import Global
+    g = Global()
+    g.initial_parameters(**params, seed=seed)
+    g.run(engine)
+    g.report_plot(path)
+
+
+def clean(x):
+    """
+    转换为 JSON 可以表示的值：numpy 标量转为 Python 数值，nan 与无穷转为 None
+    """
+    if isinstance(x, (float, np.floating)):
+        return float(x) if np.isfinite(x) else None
+    if isinstance(x, np.integer):
+        return int(x)
+    return x
+
+
+def write_csv(result, f):
+    rows = result["points"]
+    names = []
+    for row in rows:
+        names.extend(name for name in row if name not in names)
+    writer = csv.DictWriter(f, fieldnames=names)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({name: json.dumps(x) if isinstance(x, (dict, list)) else x for name, x in row.items()})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run queue simulation scenarios and sweeps without a display.")
+    parser.add_argument("spec", help="scenario or sweep spec, JSON or YAML")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes, overrides the spec")
+    parser.add_argument("--engine", default=None, help="simulation engine, overrides the spec")
+    parser.add_argument("--seed", type=int, default=None, help="root random seed, overrides the spec")
+    parser.add_argument("--format", choices=("json", "csv"), default="json")
+    parser.add_argument("--output", default=None, help="write results to this file instead of stdout")
+    parser.add_argument("--report", default=None, help="draw the report of a single scenario to this PNG/SVG file")
+    args = parser.parse_args(argv)
+
+    spec = load_spec(args.spec)
+    for name in ("workers", "engine", "seed", "report"):
+        if getattr(args, name) is not None:
+            spec[name] = getattr(args, name)
+    result = run_spec(spec)
+
+    f = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "csv":
+            write_csv(result, f)
+        else:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
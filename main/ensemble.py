@@ -0,0 +1,73 @@
+import numpy as np
+
+from main.sweep import SweepExecutor
+
+# 每次为全部重复抽取的顾客数量
+CHUNK = 4096
+
+
+def ensemble_simulate(mean_arrive, mean_serve, num_custom, max_queue, num_service, replications, seed=None,
+                      point=0, arrive_dist="exp", serve_dist="exp", chunk=CHUNK):
+    """
+    锁步集成引擎：以数组保存 R 次独立重复的状态(下一到达时刻、形状为 (R, c) 的窗口空闲时刻、等待队列与累计量)，
+    逐位顾客对全部重复同时做向量化的 Kiefer-Wolfowitz 递推，吞吐量随 R 增长而不受 Python 循环限制。
+    溢出规则与 Global.simulate 相同：所有窗口均忙且等待队列长度 > max_queue 时顾客离开。
+    第 r 次重复的随机数流与 SweepExecutor(seed).job_seed(point, r) 相同，因此每次重复的结果
+    与以该种子调用 Global.initial_parameters / run 得到的 report_print 结果一致。
+    :param replications: 重复次数 R
+    :param seed: 根随机种子
+    :param point: 参数点序号，用于派生随机数流
+    :param chunk: 每次为全部重复抽取的顾客数量
+    :return: 形状为 (R, 2) 的数组，每行为 (被服务顾客的平均逗留时间, 因队列溢出离开的顾客比例)
+    """
+    from main.preprocess import Global
+    executor = SweepExecutor(seed=seed)
+    generators = []
+    for r in range(replications):
+        g = Global()
+        g.initial_parameters(mean_arrive, mean_serve, num_custom, max_queue, num_service,
+                             seed=executor.job_seed(point, r), arrive_dist=arrive_dist, serve_dist=serve_dist)
+        generators.append(g.time_generators(num=min(num_custom, chunk)))
+
+    rows = np.arange(replications)
+    capacity = max(max_queue, 0) + 2  # 等待队列最多 max_queue + 1 人
+    free = np.zeros((replications, num_service))  # 各窗口空闲时刻
+    pending = np.zeros((replications, capacity))  # 等待顾客的开始服务时刻(环形队列，非降序)
+    head = np.zeros(replications, dtype=np.int64)
+    count = np.zeros(replications, dtype=np.int64)  # 等待队列长度
+    arrive = np.zeros(replications)  # 当前顾客的到达时刻
+    sojourn_sum = np.zeros(replications)
+    served = np.zeros(replications, dtype=np.int64)
+    balked = np.zeros(replications, dtype=np.int64)
+
+    for start in range(0, num_custom, chunk):
+        size = min(chunk, num_custom - start)
+        inter = np.stack([inter_gen.take(size) for (inter_gen, _) in generators])
+        service = np.stack([service_gen.take(size) for (_, service_gen) in generators])
+        for j in range(size):
+            a = arrive
+            s = service[:, j]
+            # 到达时刻之前已开始服务的顾客离开等待队列
+            leave = (count > 0) & (pending[rows, head] <= a)
+            while leave.any():
+                head[leave] = (head[leave] + 1) % capacity
+                count[leave] -= 1
+                leave = (count > 0) & (pending[rows, head] <= a)
+            k = free.argmin(axis=1)
+            earliest = free[rows, k]
+            busy = earliest > a
+            balk = busy & (count > max_queue)
+            accept = ~balk
+            begin = np.maximum(a, earliest)
+            # 需要等待的顾客进入等待队列
+            wait = accept & busy
+            pending[rows[wait], (head[wait] + count[wait]) % capacity] = begin[wait]
+            count[wait] += 1
+            free[rows[accept], k[accept]] = begin[accept] + s[accept]
+            sojourn_sum += np.where(accept, begin - a + s, 0.0)
+            served += accept
+            balked += balk
+            arrive = a + inter[:, j]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.column_stack((sojourn_sum / served, balked / max(num_custom, 1)))
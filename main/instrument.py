@@ -0,0 +1,73 @@
+import json
+import time as time_module
+from contextlib import contextmanager
+
+from event.events import EVENT_NAMES
+
+
+class Instrument:
+    """
+    事件循环的性能探针：按事件类型计数、记录事件队列的最大规模、统计各阶段(generate / simulate / report)的耗时，
+    并支持按事件类型注册回调与输出 JSONL 格式的事件轨迹。
+    只有赋值给 Global.instrument 时才会启用，未启用时事件循环中只多一次 None 判断。
+    """
+
+    def __init__(self, trace_path=None):
+        """
+        :param trace_path: JSONL 事件轨迹的输出路径，None 表示不输出
+        """
+        self.counts = {kind: 0 for kind in EVENT_NAMES}  # 各类型事件的数量
+        self.max_heap = 0  # 事件队列的最大规模
+        self.phase_time = {}  # 各阶段累计耗时(秒)
+        self.hooks = {kind: [] for kind in EVENT_NAMES}  # 各类型事件的回调
+        self.sink = open(trace_path, "w", buffering=1 << 20) if trace_path else None
+
+    def on(self, event_type, hook):
+        """
+        注册事件回调
+        :param event_type: 事件类型名称，如 "ARRIVE"
+        :param hook: 回调函数 hook(time, obj)，obj 为到达事件的顾客或完成事件的服务窗口
+        """
+        kind = {name: kind for kind, name in EVENT_NAMES.items()}[event_type]
+        self.hooks[kind].append(hook)
+
+    @contextmanager
+    def phase(self, name):
+        start = time_module.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_time[name] = self.phase_time.get(name, 0) + time_module.perf_counter() - start
+
+    def event(self, time, kind, obj, heap_size):
+        """
+        由事件循环在每个事件发生时调用
+        """
+        self.counts[kind] += 1
+        if heap_size > self.max_heap:
+            self.max_heap = heap_size
+        for hook in self.hooks[kind]:
+            hook(time, obj)
+        if self.sink is not None:
+            self.sink.write(json.dumps({"time": time, "event": EVENT_NAMES[kind], "id": obj.id,
+                                        "heap": heap_size}) + "\n")
+
+    def total_events(self):
+        return sum(self.counts.values())
+
+    def events_per_second(self):
+        elapsed = self.phase_time.get("simulate", 0)
+        return self.total_events() / elapsed if elapsed > 0 else 0
+
+    def summary(self):
+        return {
+            "events": {EVENT_NAMES[kind]: count for kind, count in self.counts.items()},
+            "max_heap": self.max_heap,
+            "phase_time": dict(self.phase_time),
+            "events_per_second": self.events_per_second(),
+        }
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
@@ -0,0 +1,146 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+# 向量化分段的长度范围：分段过短时 numpy 的调用开销会超过逐个计算的开销
+MIN_BLOCK = 64
+MAX_BLOCK = 1 << 16
+# 发生溢出后改用逐个递推处理的顾客数量
+SCALAR_RUN = 256
+
+
+def fifo_arrive_times(inter):
+    """
+    由到达间隔计算到达时刻，与 Global.customers_generate 一致：第一位顾客在 0 时刻到达，
+    arrive_inter 为与下一位顾客的间隔
+    """
+    arrive = np.empty(len(inter))
+    if len(inter) > 0:
+        arrive[0] = 0.0
+        np.cumsum(inter[:-1], out=arrive[1:])
+    return arrive
+
+
+def fifo_simulate(arrive, service, num_service, max_queue):
+    """
+    FIFO M/M/c/K 快速通道：不经过事件循环，直接由到达时刻与服务时长计算每位顾客的开始服务时刻。
+    c=1 时使用分段向量化的 Lindley 递推，c>1 时使用 Kiefer-Wolfowitz 工作负载向量递推(以最小堆维护各窗口的空闲时刻)。
+    溢出规则与 Global.simulate 相同：所有窗口均忙且等待队列长度 > max_queue 时顾客离开。
+    :param arrive: 到达时刻数组(非降序)
+    :param service: 服务时长数组
+    :param num_service: 服务窗口数量
+    :param max_queue: 队列最大长度
+    :return: (begin, balked) 开始服务时刻(离开的顾客为 nan)，是否因队列溢出离开
+    """
+    arrive = np.asarray(arrive, dtype=float)
+    service = np.asarray(service, dtype=float)
+    n = len(arrive)
+    begin = np.full(n, np.nan)
+    balked = np.zeros(n, dtype=bool)
+    free = [0.0] * num_service  # 各窗口空闲时刻(最小堆)
+    pending = deque()  # 已接纳但尚未开始服务的顾客的开始服务时刻(非降序)
+
+    if num_service != 1:
+        _scalar_run(arrive, service, begin, balked, 0, n, free, pending, max_queue)
+        return begin, balked
+
+    i = 0
+    block = MIN_BLOCK
+    while i < n:
+        j = min(n, i + block)
+        committed = _lindley_block(arrive, service, begin, i, j, free, pending, max_queue)
+        i += committed
+        if i == j:
+            block = min(MAX_BLOCK, block * 2)
+            continue
+        # 顾客 i 因队列溢出离开，系统状态不变
+        balked[i] = True
+        i += 1
+        if committed < MIN_BLOCK:
+            # 溢出过于密集，向量化分段得不偿失，先逐个递推一段
+            k = min(n, i + SCALAR_RUN)
+            _scalar_run(arrive, service, begin, balked, i, k, free, pending, max_queue)
+            i = k
+            block = MIN_BLOCK
+        else:
+            block = max(MIN_BLOCK, min(MAX_BLOCK, 2 * committed))
+    return begin, balked
+
+
+def _lindley_block(arrive, service, begin, i, j, free, pending, max_queue):
+    """
+    假设 [i, j) 的顾客全部被接纳，用向量化的 Lindley 递推计算开始服务时刻，并找出第一位会因溢出离开的顾客。
+    只写入该顾客之前的结果，并更新 free / pending。
+    :return: 被接纳的顾客数量
+    """
+    a = arrive[i:j]
+    s = service[i:j]
+    # D_k = max(a_k, D_{k-1}) + s_k 展开后为 D_k = S_k + max(D_{i-1}, max_{m<=k}(a_m - S_{m-1}))
+    cum = np.cumsum(s)
+    depart = cum + np.maximum(np.maximum.accumulate(a - cum + s), free[0])
+    prev_depart = np.empty(j - i)
+    prev_depart[0] = free[0]
+    prev_depart[1:] = depart[:-1]
+    b = np.maximum(a, prev_depart)
+    # 到达时刻的等待人数 = 之前分段遗留的等待顾客 + 本分段中之前到达且尚未开始服务的顾客
+    idx = np.arange(j - i)
+    queued = idx - np.minimum(np.searchsorted(b, a, side="right"), idx)
+    if pending:
+        p = np.fromiter(pending, dtype=float, count=len(pending))
+        queued += len(p) - np.searchsorted(p, a, side="right")
+    overflow = np.flatnonzero((queued > max_queue) & (prev_depart > a))
+    committed = overflow[0] if len(overflow) else j - i
+
+    if committed > 0:
+        begin[i:i + committed] = b[:committed]
+        free[0] = depart[committed - 1]
+        # 只保留对之后到达的顾客仍处于等待状态的部分
+        ref = a[committed] if committed < j - i else a[-1]
+        waiting = b[:committed]
+        waiting = waiting[waiting > ref]
+        kept = [x for x in pending if x > ref]
+        pending.clear()
+        pending.extend(kept)
+        pending.extend(waiting.tolist())
+    return int(committed)
+
+
+def _scalar_run(arrive, service, begin, balked, i, j, free, pending, max_queue):
+    """
+    逐个顾客的 Kiefer-Wolfowitz 递推：顾客在 max(到达时刻, 最早空闲窗口的时刻) 开始服务
+    """
+    a_list = arrive[i:j].tolist()
+    s_list = service[i:j].tolist()
+    out = [0.0] * (j - i)
+    heapreplace = heapq.heapreplace
+    popleft = pending.popleft
+    append = pending.append
+    nan = float("nan")
+    for k in range(j - i):
+        a = a_list[k]
+        while pending and pending[0] <= a:
+            popleft()
+        earliest = free[0]
+        if earliest > a and len(pending) > max_queue:
+            out[k] = nan
+            balked[i + k] = True
+            continue
+        if earliest > a:
+            append(earliest)
+            b = earliest
+        else:
+            b = a
+        out[k] = b
+        heapreplace(free, b + s_list[k])
+    begin[i:j] = out
+
+
+def fifo_report(arrive, service, begin, balked):
+    """
+    由快速通道的结果计算与 Global.report_print 相同的量化结果
+    :return: (被服务顾客的平均逗留时间, 因队列溢出离开的顾客比例)
+    """
+    served = ~balked
+    sojourn = begin[served] - arrive[served] + service[served]
+    return sojourn.mean(), balked.mean()
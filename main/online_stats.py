@@ -0,0 +1,160 @@
+import math
+
+
+class Welford:
+    """
+    在线均值/方差 (Welford 算法)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+
+class TimeWeighted:
+    """
+    阶梯函数的在线时间积分，如队列人数、忙碌窗口数量
+    """
+
+    def __init__(self, time=0.0, value=0):
+        self.last_time = time
+        self.value = value
+        self.area = 0.0
+
+    def update(self, time, value):
+        """
+        在 time 时刻函数值变为 value
+        """
+        self.area += self.value * (time - self.last_time)
+        self.last_time = time
+        self.value = value
+
+    def average(self, time):
+        """
+        [0, time] 上的时间平均，time 不早于最近一次更新
+        """
+        area = self.area + self.value * (time - self.last_time)
+        return area / time if time > 0 else 0
+
+
+class P2Quantile:
+    """
+    P² 分位数估计 (Jain & Chlamtac, 1985)，只保存 5 个标记点
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        # 找到 x 所在的区间并更新端点
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = max(q[4], x)
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        # 调整中间三个标记点的高度
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = candidate
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q = self.heights
+        n = self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self):
+        q = self.heights
+        if len(q) == 5:
+            return q[2]
+        if not q:
+            return math.nan
+        return sorted(q)[min(len(q) - 1, int(round(self.p * (len(q) - 1))))]
+
+
+class StreamingStats:
+    """
+    流式统计量：随事件在线更新，不保存任何顾客的历史记录
+    """
+
+    def __init__(self, quantiles=()):
+        """
+        :param quantiles: 需要估计的逗留时间分位数，如 (0.5, 0.9, 0.99)
+        """
+        self.arrivals = 0  # 到达顾客数
+        self.overflow = 0  # 因队列溢出离开的顾客数
+        self.wait = Welford()  # 等待时间
+        self.sojourn = Welford()  # 逗留时间(等待+服务)
+        self.queue_length = TimeWeighted()  # 队列人数的时间积分
+        self.busy_service = TimeWeighted()  # 忙碌窗口数量的时间积分
+        self.quantiles = {p: P2Quantile(p) for p in quantiles}
+
+    def begin_service(self, wait, service):
+        self.wait.add(wait)
+        sojourn = wait + service
+        self.sojourn.add(sojourn)
+        for estimator in self.quantiles.values():
+            estimator.add(sojourn)
+
+    def report(self):
+        """
+        :return: 与 Global.report_print 相同的量化结果 (被服务顾客的平均逗留时间, 因队列溢出离开的顾客比例)
+        """
+        return self.sojourn.mean, self.overflow / self.arrivals if self.arrivals else 0
+
+    def summary(self, time):
+        """
+        :param time: 仿真结束时刻
+        :return: 全部统计量的字典
+        """
+        return {
+            "arrivals": self.arrivals,
+            "overflow": self.overflow,
+            "overflow_rate": self.report()[1],
+            "wait_mean": self.wait.mean,
+            "wait_std": self.wait.std(),
+            "sojourn_mean": self.sojourn.mean,
+            "sojourn_std": self.sojourn.std(),
+            "sojourn_quantiles": {p: estimator.value() for p, estimator in self.quantiles.items()},
+            "ave_queue_length": self.queue_length.average(time),
+            "ave_busy_service": self.busy_service.average(time),
+        }
@@ -0,0 +1,164 @@
+import numpy as np
+from matplotlib import pyplot as plt
+from matplotlib.figure import Figure
+
+from time_support.TimeAverageIndex import TimeAverageIndex
+
+# 每条曲线保留的点数上限，约为图片的水平像素数
+PIXELS = 1200
+# 顾客数量不超过该值时逐位画出顾客的逗留区间，否则画出抽稀后的逗留时间序列
+MAX_SEGMENTS = 200
+# 依次尝试的绘图风格，新版 matplotlib 中 seaborn 风格更名为 seaborn-v0_8
+STYLES = ("seaborn-v0_8", "seaborn", "ggplot")
+
+
+def style():
+    """
+    :return: 当前 matplotlib 中可用的绘图风格
+    """
+    for name in STYLES:
+        if name in plt.style.available:
+            return name
+    return "default"
+
+
+def decimate_minmax(x, y, points=PIXELS):
+    """
+    最小/最大值抽稀：将序列分为不超过 points / 2 段，每段按原顺序保留最小值与最大值两个点，
+    峰值与谷值不会丢失，适合噪声较大的长序列；结果不超过 points 个点
+    :return: 抽稀后的 (x, y)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    buckets = points // 2
+    if len(y) <= points or buckets < 1:
+        return x, y
+    # 段长向上取整，最后一段不足的部分以 nan 填充，剩余的点并入最后一段而不是原样保留
+    size = -(-len(y) // buckets)
+    rows = -(-len(y) // size)
+    blocks = np.full(rows * size, np.nan)
+    blocks[:len(y)] = y
+    blocks = blocks.reshape(rows, size)
+    base = np.arange(rows) * size
+    lo = base + np.nanargmin(blocks, axis=1)
+    hi = base + np.nanargmax(blocks, axis=1)
+    idx = np.unique(np.concatenate((lo, hi)))
+    return x[idx], y[idx]
+
+
+def lttb(x, y, points=PIXELS):
+    """
+    Largest-Triangle-Three-Buckets 抽稀：首尾点保留，中间等分为 points - 2 段，
+    每段选取与前一个选中点、下一段均值构成的三角形面积最大的点，适合平滑的长曲线
+    :return: 抽稀后的 (x, y)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= points or points < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    # 各段的均值，用作下一段的参考点；最后一段的参考点为末尾点
+    cx = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / np.diff(edges), x[-1])
+    cy = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / np.diff(edges), y[-1])
+    idx = np.empty(points, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for k in range(points - 2):
+        lo, hi = edges[k], edges[k + 1]
+        area = np.abs((x[a] - cx[k + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy[k + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[k + 1] = a
+    return x[idx], y[idx]
+
+
+DECIMATE = {"minmax": decimate_minmax, "lttb": lttb}
+
+
+def usage_indexes(global_, begin, service):
+    """
+    :return: [(标签, 利用率的时间平均索引, 窗口数量)]，快速通道不区分窗口，只给出全部窗口的平均利用率
+    """
+    if global_.fifo_result is not None or not global_.service_list:
+        served = ~np.isnan(begin)
+        return [("all", TimeAverageIndex(begin[served], (begin + service)[served]), global_.number_of_service)]
+    # 列式模式下 build_index 由 RunStore 建立
+    return [(str(s.id), s.build_index(), 1) for s in global_.service_list]
+
+
+def render_report(global_, fig, points=PIXELS, method="minmax"):
+    """
+    在 fig 上画出 Global.report_plot 的各面板，每条序列只调用一次绘图函数，长序列先抽稀到 points 个点
+    :param global_: 已完成仿真的 Global 实例
+    :param fig: matplotlib Figure
+    :param points: 每条曲线保留的点数上限
+    :param method: 抽稀方法，"minmax" 或 "lttb"
+    """
+    decimate = DECIMATE[method]
+    arrive, inter, service, begin = global_.customer_arrays()
+    num = len(arrive)
+    served = ~np.isnan(begin)
+    end_time = float(np.nanmax(begin + service)) if served.any() else global_.timer.get_time()
+
+    # 乘客到达时间分布情况
+    ax = fig.add_subplot(3, 2, 1)
+    ax.set_xlabel("arrival internal/s")
+    ax.set_ylabel("number")
+    ax.set_title("Customer Arrival Internal Time Distribution in {} Customers".format(num))
+    counts, bins = np.histogram(inter)
+    ax.stairs(counts, bins, fill=True)
+
+    # 乘客服务时间分布情况
+    ax = fig.add_subplot(3, 2, 2)
+    ax.set_xlabel("service time/s")
+    ax.set_ylabel("number")
+    ax.set_title("Customer Service Time Distribution in {} Customers".format(num))
+    counts, bins = np.histogram(service)
+    ax.stairs(counts, bins, fill=True)
+
+    # 时间平均曲线是平滑的，直接在像素分辨率的时间网格上取值
+    times = np.linspace(1, max(end_time, 1), points)
+
+    # 队列平均顾客数：顾客从到达至开始服务期间在队列中
+    ax = fig.add_subplot(3, 2, 3)
+    ax.set_xlabel("time")
+    ax.set_ylabel("average customers in queue")
+    ax.set_title("Average Number Of Customers in Queue By time")
+    waited = served & (begin > arrive)
+    queue_index = TimeAverageIndex(arrive[waited], begin[waited])
+    ax.plot(times, queue_index.average(times))
+
+    # 服务器平均利用率
+    ax = fig.add_subplot(3, 2, 4)
+    ax.set_xlabel("time")
+    ax.set_ylabel("average usage in queue")
+    ax.set_title("Average Service Time By time")
+    for (label, index, servers) in usage_indexes(global_, begin, service):
+        ax.plot(times, index.average(times) / servers, label=label)
+
+    # 顾客去留情况
+    ax = fig.add_subplot(3, 1, 3)
+    order = np.arange(1, num + 1)
+    if num <= MAX_SEGMENTS:
+        ax.set_title("Served Customers's Distribution By time")
+        ax.hlines(order[served], arrive[served], (begin + service)[served])
+        ax.scatter(arrive[~served], order[~served], marker="x")
+    else:
+        ax.set_title("Sojourn Time By Arrival Time")
+        ax.set_xlabel("arrival time")
+        ax.set_ylabel("sojourn time")
+        x, y = decimate(arrive[served], (begin - arrive + service)[served], points)
+        ax.plot(x, y, linewidth=0.8)
+    return fig
+
+
+def save_report(global_, path, figsize=(12, 15), dpi=100, method="minmax"):
+    """
+    不经过 pyplot 与交互式后端，直接将报告图写入文件(格式由扩展名决定，如 .png、.svg)，适用于无显示器的环境
+    """
+    with plt.style.context(style()):
+        fig = Figure(figsize=figsize, dpi=dpi)
+        render_report(global_, fig, points=int(figsize[0] * dpi), method=method)
+        fig.tight_layout()
+        fig.savefig(path)
+    return path
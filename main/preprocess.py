@@ -1,13 +1,33 @@
-import queue
-import matplotlib.pyplot as plt
+import pickle
+from contextlib import nullcontext
 import numpy as np
+from main import utils
 from main.utils import debug_print
-from event.events import Event
+from main.lindley import fifo_arrive_times, fifo_simulate, fifo_report
+from main.sweep import SweepExecutor
+from main.online_stats import StreamingStats
+from main.analytic import mmck
+from main.rare_event import overflow_probability
+from main.replication import mser
+from main.adaptive import adaptive_sweep
+from event.events import ARRIVE, FINISH
+from event.EventList import FutureEventList
 from object.Customer import Customer
 from object.Service import Service
+from object.ServicePool import ServicePool
 from object.WaitQueue import WaitQueue
+from object.RunStore import RunStore, CustomerListView
 from time_support.Timer import Timer
-from time_support.RandomTimeGenerator import RandomTimeGenerator
+from time_support.TimeAverageIndex import TimeAverageIndex
+from time_support.RandomTimeGenerator import RandomTimeGenerator, is_scale_family
+from time_support.BaseStreamCache import BaseStreamCache
+from time_support.ArrivalSource import ArrivalSource
+
+
+# 流式模式下每次抽取随机数的块大小
+STREAM_BLOCK = 1 << 16
+# 公共随机数模式下的基础随机数流缓存，进程内共享；可替换为带 spill_dir 的实例以便溢出到磁盘
+BASE_STREAMS = BaseStreamCache()
 
 
 class Global:
@@ -22,159 +42,556 @@ class Global:
         self.number_of_customs = 0  # 顾客总人数
         self.max_queue_length = 0  # 队列最大长度
         self.number_of_service = 0  # 服务窗口数量
+        self.arrive_dist = "exp"  # 到达间隔的分布，见 time_support.RandomTimeGenerator
+        self.serve_dist = "exp"  # 服务时长的分布
+        self.seed_sequence = None  # 本次仿真的根随机种子
+        self.trace = None  # 轨迹回放源，见 time_support.TraceSource
+        self.instrument = None  # 性能探针，见 main.instrument，为 None 时不启用
+        self.rng = None  # 窗口分配使用的随机数生成器
+        self.streaming = False  # 流式模式：不保存任何顾客的历史记录，只在线更新统计量
+        self.stats = None  # 流式统计量
+        self.store = None  # 列式结果存储，见 object.RunStore
+        self.crn = False  # 公共随机数模式：到达间隔与服务时长由缓存的基础流按均值缩放得到
+        self.generators = None  # 生成顾客所用的 (到达间隔生成器, 服务时长生成器)，续跑时继续取用
+        self.arrivals = None  # 到达顾客的数据源，见 time_support.ArrivalSource
+        self.paused = False  # simulate(drain=False) 停在下一次到达之前，可以 extend 后续跑
+        self.warmup = 0  # report_print 截去的预热期顾客数量
 
         # 列表
         self.custom_list = []  # 顾客列表，按照到达时间排列
+        self.fifo_result = None  # 快速通道的结果 (arrive, service, begin, balked)
         self.service_list = []  # 服务器列表，默认为1
+        self.dispatch = "random"  # 空闲窗口的分配策略，见 object.ServicePool
+        self.service_pool = None  # 空闲窗口索引
 
         # 队列
-        self.event_queue = queue.PriorityQueue()  # 未来事件队列(FEL)，按照时间从小到大排序
+        self.event_queue = FutureEventList()  # 未来事件队列(FEL)，按照时间从小到大排序
         self.wait_queue = WaitQueue(timer=self.timer)  # 顾客等待队列
 
-    def initial_parameters(self, mean_arrive=50.0, mean_serve=100.0, num_custom=100, max_queue=15, num_service=1):
+    def initial_parameters(self, mean_arrive=50.0, mean_serve=100.0, num_custom=100, max_queue=15, num_service=1,
+                           seed=None, streaming=False, quantiles=(), columnar=False, dispatch="random",
+                           arrive_dist="exp", serve_dist="exp", trace=None, crn=False):
         # initial value
         self.mean_inter_arrival = mean_arrive
         self.mean_service = mean_serve
         self.number_of_customs = num_custom
         self.max_queue_length = max_queue
         self.number_of_service = num_service
+        # 分布名称或带形状参数的字典，如 {"type": "erlang", "k": 3}
+        self.arrive_dist = arrive_dist
+        self.serve_dist = serve_dist
+        # 指定轨迹回放源时，顾客的到达与服务时长取自轨迹，顾客人数为轨迹窗口内的行数
+        self.trace = trace
+        if trace is not None:
+            self.number_of_customs = num_custom = len(trace)
+        # 指定 seed (int 或 numpy.random.SeedSequence) 时使用独立的随机数流，便于复现与并行；
+        # 未指定时由全局随机状态派生，np.random.seed 仍可复现结果
+        if seed is None:
+            seed = np.random.randint(2 ** 31)
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.child_seed(2))
+        self.dispatch = dispatch
+        # 公共随机数模式下同一 seed 在不同参数点上使用相同的基础流，参数点之间的差异不再受抽样噪声支配
+        if crn and streaming:
+            raise ValueError("Common random numbers are not available in streaming mode.")
+        self.crn = crn
+        # 流式模式下内存占用为 O(服务窗口数量 + 队列容量)，quantiles 为需要在线估计的逗留时间分位数
+        self.streaming = streaming
+        self.stats = StreamingStats(quantiles) if streaming else None
+        # 列式模式下顾客数据保存在预分配的 numpy 数组中，custom_list 为其只读视图
+        self.store = RunStore(num_custom) if columnar else None
         # clear
-        self.custom_list.clear()
+        self.custom_list = [] if not columnar else CustomerListView(self.store)
         self.service_list.clear()
-        self.wait_queue = WaitQueue(timer=self.timer)
-        self.event_queue = queue.PriorityQueue()
+        self.fifo_result = None
+        self.generators = None
+        self.arrivals = None
+        self.paused = False
+        self.warmup = 0
+        self.wait_queue = WaitQueue(timer=self.timer, keep_record=not (streaming or columnar), store=self.store)
+        self.event_queue = FutureEventList()
         self.timer.reset()
 
+    def child_seed(self, k):
+        """
+        派生第 k 条随机数流：0 到达间隔，1 服务时长，2 窗口分配
+        不修改 seed_sequence 本身，同一 seed 总是得到相同的随机数流
+        """
+        return np.random.SeedSequence(self.seed_sequence.entropy,
+                                      spawn_key=tuple(self.seed_sequence.spawn_key) + (k,))
+
+    def time_generators(self, num=None):
+        """
+        到达间隔与服务时长各使用一条独立的随机数流，每次调用都从流的起点开始，
+        因此逐个生成、按块生成与整体生成得到相同的样本
+        :param num: 预计取用的数量，默认为顾客总人数
+        :return: (到达间隔生成器, 服务时长生成器)
+        """
+        num = self.number_of_customs if num is None else num
+        inter_gen = RandomTimeGenerator(self.mean_inter_arrival, num, self.arrive_dist,
+                                        rng=np.random.default_rng(self.child_seed(0)))
+        service_gen = RandomTimeGenerator(self.mean_service, num, self.serve_dist,
+                                          rng=np.random.default_rng(self.child_seed(1)))
+        return inter_gen, service_gen
+
     def service_generate(self):
+        self.service_pool = ServicePool(self.dispatch, self.rng)
         for i in range(0, self.number_of_service):
-            self.service_list.append(Service(id=i, timer=self.timer))
+            self.service_list.append(Service(id=i, timer=self.timer,
+                                             keep_record=not (self.streaming or self.store is not None),
+                                             store=self.store,
+                                             pool=self.service_pool))
 
     def customers_generate(self):
+        # 流式模式下顾客在仿真过程中逐个生成，见 arrival_source
+        if self.streaming:
+            return
+        # 列式模式下直接填写到达、服务时间列，随机数与逐个生成时相同
+        if self.store is not None:
+            arrive, inter, service = self.arrival_arrays()
+            self.store.arrive_inter[:] = inter
+            self.store.service[:] = service
+            self.store.arrive[:] = arrive
+            return
+        # 轨迹回放时顾客在仿真过程中按块读取、逐个生成，见 arrival_source
+        if self.trace is not None:
+            return
         # 定义<internal>随机数生成器和<service>随机数生成器
-        inter_gen = RandomTimeGenerator(self.mean_inter_arrival, self.number_of_customs, "exp", shuffle=False)
-        service_gen = RandomTimeGenerator(self.mean_service, self.number_of_customs, "exp")
+        if self.crn:
+            inter_list, service_list = (x.tolist() for x in self.arrays_generate())
+            inter_next, service_next = iter(inter_list).__next__, iter(service_list).__next__
+        else:
+            inter_gen, service_gen = self.generators = self.time_generators()
+            inter_next, service_next = inter_gen.next, service_gen.next
         cur_time = 0
         for i in range(0, self.number_of_customs):
-            inter = inter_gen.next()
-            service_time = service_gen.next()
+            inter = inter_next()
+            service_time = service_next()
             c = Customer(id=i, timer=self.timer, arrive=cur_time, arrive_inter=inter,
                          service=service_time)
             self.custom_list.append(c)
             cur_time += inter
-            debug_print("Customer {} arrival {:.5f} service {:.5f}".format(i, cur_time, service_time))
-
-    def simulate(self):
-        # step 1 : 向事件队列中加入所有<到达事件>
-        for customer in self.custom_list:
-            event = Event(object_=customer, time=customer.arrive, event_type="ARRIVE")
-            self.event_queue.put(event)
-            debug_print("[DEBUG] {:.5f} event add ARRIVE {:.5f}".format(self.timer.get_time(), customer.arrive))
+            debug_print("Customer {} arrival {:.5f} service {:.5f}", i, cur_time, service_time)
+
+    def arrays_generate(self):
+        """
+        与 customers_generate 使用相同的随机数生成方式，但只返回数组而不建立 Customer 对象
+        :return: (到达间隔数组, 服务时长数组)
+        """
+        if self.crn:
+            return (self.base_stream(0, self.mean_inter_arrival, self.arrive_dist),
+                    self.base_stream(1, self.mean_service, self.serve_dist))
+        inter_gen, service_gen = self.generators = self.time_generators()
+        return inter_gen.take(self.number_of_customs), service_gen.take(self.number_of_customs)
+
+    def base_stream(self, k, mean, dist):
+        """
+        公共随机数模式下第 k 条随机数流的样本：尺度族分布取缓存中均值为 1 的基础流再乘以 mean，
+        泊松分布不是尺度族，直接以相同的种子抽样(仍是公共随机数，但不经过缓存)
+        """
+        num = self.number_of_customs
+        seed = self.child_seed(k)
+        if not is_scale_family(dist) or mean is None:
+            return RandomTimeGenerator(mean, num, dist, rng=np.random.default_rng(seed)).take(num)
+        key = (seed.entropy, tuple(seed.spawn_key), repr(dist), num)
+        base = BASE_STREAMS.get(key, lambda: RandomTimeGenerator(1.0, num, dist,
+                                                                  rng=np.random.default_rng(seed)).take(num))
+        return base * mean
+
+    def arrival_arrays(self):
+        """
+        :return: (到达时刻, 到达间隔, 服务时长) 三个数组，取自轨迹回放源或随机数生成器
+        """
+        if self.trace is not None:
+            return self.trace.arrays()
+        inter, service = self.arrays_generate()
+        return fifo_arrive_times(inter), inter, service
+
+    def simulate_fast(self):
+        """
+        FIFO 快速通道：跳过事件循环，直接由随机数数组递推出每位顾客的开始服务时刻
+        结果保存在 self.fifo_result = (arrive, service, begin, balked) 中
+        :return: 与 report_print 相同的量化结果
+        """
+        arrive, inter, service = self.arrival_arrays()
+        begin, balked = fifo_simulate(arrive, service, self.number_of_service, self.max_queue_length)
+        self.fifo_result = (arrive, service, begin, balked)
+        if self.store is not None:
+            # 快速通道不区分服务窗口，server_id 保持为 -1
+            store = self.store
+            store.arrive[:], store.arrive_inter[:], store.service[:] = arrive, inter, service
+            store.begin_service[:] = begin
+            store.end_service[:] = begin + service
+            store.balked[:] = balked
+            store.enter_queue[:] = np.where(begin > arrive, arrive, np.nan)
+        return fifo_report(arrive, service, begin, balked)
+
+    def run(self, engine="event"):
+        """
+        在已设置好的参数下完成一次仿真
+        :param engine: "event" 为事件推进型仿真，"fast" 为 FIFO 快速通道，"analytic" 为 M/M/c/K 的稳态解析解
+        :return: 与 report_print 相同的量化结果
+        """
+        if engine == "analytic":
+            exact = self.analytic()
+            return exact["sojourn"], exact["overflow"]
+        elif engine == "fast":
+            with self.phase("simulate"):
+                return self.simulate_fast()
+        elif engine == "event":
+            with self.phase("generate"):
+                self.service_generate()
+                self.customers_generate()
+            with self.phase("simulate"):
+                self.simulate()
+            with self.phase("report"):
+                return self.report_print()
+        else:
+            raise ValueError("Unknown simulation engine {}.".format(engine))
+
+    def analytic(self):
+        """
+        当前参数下 M/M/c/K 的稳态解析结果，见 main.analytic.mmck
+        """
+        if self.arrive_dist != "exp" or self.serve_dist != "exp" or self.trace is not None:
+            raise ValueError("Analytic results are only available for exponential arrivals and services.")
+        return mmck(float(self.mean_inter_arrival), float(self.mean_service), self.number_of_service,
+                    self.max_queue_length)
+
+    def rare_overflow(self):
+        """
+        当前参数下的溢出概率，由再生周期分解精确求出，适用于溢出概率极小、直接仿真几乎观察不到溢出的情形，
+        见 main.rare_event.overflow_probability
+        :return: 字典 {"overflow": 溢出概率, "hitting": 周期内到达满员的概率, ...}
+        """
+        if self.arrive_dist != "exp" or self.serve_dist != "exp" or self.trace is not None:
+            raise ValueError("The rare-event decomposition is only available for exponential arrivals and services.")
+        return overflow_probability(float(self.mean_inter_arrival), float(self.mean_service), self.number_of_service,
+                                    self.max_queue_length)
+
+    def control_statistics(self):
+        """
+        本次仿真中期望已知的统计量，用作控制变量
+        :return: (观测到的平均服务时长, 观测到的平均到达间隔)，期望分别为 mean_service 与 mean_inter_arrival
+        """
+        if self.fifo_result is not None:
+            arrive, service = self.fifo_result[0], self.fifo_result[1]
+        elif self.store is not None:
+            arrive, service = self.store.arrive, self.store.service
+        elif not self.streaming:
+            arrive = np.array([custom.arrive for custom in self.custom_list])
+            service = np.array([custom.service for custom in self.custom_list])
+        else:
+            raise ValueError("Control statistics are not kept in streaming mode.")
+        return float(service.mean()), float(arrive[-1] / (len(arrive) - 1)) if len(arrive) > 1 else np.nan
+
+    def phase(self, name):
+        """
+        启用性能探针时统计该阶段的耗时，否则不做任何事
+        """
+        return self.instrument.phase(name) if self.instrument is not None else nullcontext()
+
+    def customer_outcomes(self):
+        """
+        按到达顺序返回每位顾客的结果，适用于事件推进型仿真与快速通道
+        :return: (逗留时间数组(离开的顾客为 nan), 是否因队列溢出离开)
+        """
+        if self.fifo_result is not None:
+            arrive, service, begin, balked = self.fifo_result
+            return begin - arrive + service, balked
+        if self.store is not None:
+            return self.store.sojourn(), self.store.balked.copy()
+        # 暂停时仍在排队的顾客既未被服务也未离开
+        balked = np.array([custom.begin_service_time is None and custom.begin_wait_time is None
+                           for custom in self.custom_list], dtype=bool)
+        sojourn = np.array([np.nan if custom.begin_service_time is None else custom.get_wait_length() + custom.service
+                            for custom in self.custom_list], dtype=float)
+        return sojourn, balked
+
+    def customer_arrays(self):
+        """
+        从任意仿真模式的结果中取出按到达顺序排列的数组
+        :return: (到达时刻, 到达间隔, 服务时长, 开始服务时刻(未被服务为 nan))
+        """
+        if self.fifo_result is not None:
+            arrive, service, begin, _ = self.fifo_result
+            inter = np.append(np.diff(arrive), 0.0)
+            return arrive, inter, service, begin
+        if self.store is not None:
+            store = self.store
+            return store.arrive, store.arrive_inter, store.service, store.begin_service
+        if self.streaming:
+            raise ValueError("Per-customer results are not kept in streaming mode.")
+        customers = self.custom_list
+        arrive = np.array([custom.arrive for custom in customers], dtype=float)
+        inter = np.array([custom.arrive_inter for custom in customers], dtype=float)
+        service = np.array([custom.service for custom in customers], dtype=float)
+        begin = np.array([np.nan if custom.begin_service_time is None else custom.begin_service_time
+                          for custom in customers], dtype=float)
+        return arrive, inter, service, begin
+
+    def time_average_curves(self, times):
+        """
+        队列平均人数与窗口平均利用率随时间的变化，各仿真引擎给出相同的曲线(快速通道不区分窗口，只给出全部窗口的平均值)
+        :param times: 时间网格，同一网格上的曲线可以在重复仿真之间平均
+        :return: 字典 {"times": 时间网格, "queue": 队列平均人数, "usage": 窗口平均利用率}
+        """
+        times = np.asarray(times, dtype=float)
+        arrive, _, service, begin = self.customer_arrays()
+        served = ~np.isnan(begin)
+        waited = served & (begin > arrive)
+        queue = TimeAverageIndex(arrive[waited], begin[waited]).average(times)
+        usage = TimeAverageIndex(begin[served], (begin + service)[served]).average(times) / self.number_of_service
+        return {"times": times, "queue": queue, "usage": usage}
+
+    def arrival_source(self):
+        """
+        按到达顺序给出顾客的数据源：普通模式下遍历 custom_list，列式模式与轨迹回放按块读取，
+        流式模式下按块抽取随机数并逐个生成顾客
+        """
+        if self.store is not None:
+            # 列式模式下只为尚在系统中的顾客建立 Customer 对象
+            return ArrivalSource(self.timer, self.number_of_customs, store=self.store, block=STREAM_BLOCK)
+        if self.trace is not None:
+            # 普通模式下顾客在到达时才加入 custom_list
+            return ArrivalSource(self.timer, self.number_of_customs, trace=self.trace,
+                                 record=None if self.streaming else self.custom_list, block=STREAM_BLOCK)
+        if not self.streaming:
+            return ArrivalSource(self.timer, self.number_of_customs, customers=self.custom_list)
+        self.generators = self.time_generators(num=min(self.number_of_customs, STREAM_BLOCK))
+        return ArrivalSource(self.timer, self.number_of_customs, generators=self.generators)
+
+    def simulate(self, drain=True):
+        """
+        事件推进型仿真；再次调用时从上次暂停处继续
+        :param drain: 为 True 时处理完所有事件；为 False 时在最后一位顾客之后的下一次到达时刻之前暂停，
+                      此后可以 save_checkpoint 保存，或 extend 追加顾客后再次调用本方法续跑
+        """
+        push = self.event_queue.push
+        pop = self.event_queue.pop
+        timer = self.timer
+        acquire = self.service_pool.acquire
+        stats = self.stats
+        store = self.store
+        instrument = self.instrument
+        verbose = utils.debug  # 关闭调试时跳过调试输出的调用
+        busy = sum(1 for service in self.service_list if service.busy)  # 忙碌窗口数量
+
+        # step 1 : 只向事件队列中加入第一位顾客(续跑时为追加的第一位顾客)的<到达事件>，
+        # 后续到达在前一位到达时再调度，使得事件队列的规模保持在 O(服务窗口数量)
+        if self.arrivals is None:
+            self.arrivals = self.arrival_source()
+        next_arrival = self.arrivals.next
+        customer = next_arrival()
+        if customer is not None:
+            push(customer.arrive, ARRIVE, customer)
+        elif not drain and self.paused:
+            return  # 暂停后没有追加顾客，无事可做
+        horizon = None  # 顾客取完后下一次到达的时刻
+        heap = self.event_queue.heap
 
         # step 2 : 事件推进型仿真
-        while not self.event_queue.empty():
+        while heap:
+            if horizon is not None and heap[0][0] >= horizon:
+                self.paused = True
+                return
             # 取出队头事件，并推进时间至事件发生时刻
-            event = self.event_queue.get()
-            self.timer.forward(event.get_time())
+            time, _, kind, obj = pop()
+            timer.forward(time)
+            if instrument is not None:
+                instrument.event(time, kind, obj, len(self.event_queue.heap) + 1)
             # 乘客到达型 事件
-            if event.event_type == "ARRIVE":
-                customer = event.get_object()
-                free_service = [service for service in self.service_list if not service.isBusy()]  # 查询是否有空闲窗口
+            if kind == ARRIVE:
+                customer = obj
+                # 调度下一位顾客的到达
+                next_customer = next_arrival()
+                if next_customer is not None:
+                    push(next_customer.arrive, ARRIVE, next_customer)
+                elif not drain:
+                    horizon = customer.arrive + customer.arrive_inter
+                if stats is not None:
+                    stats.arrivals += 1
+                target_service = acquire()  # 按分配策略从空闲窗口索引中取出一个窗口
                 # 如果当前存在空闲窗口，则不排队直接去
-                if len(free_service) > 0:
-                    # 选择一个空闲窗口， 前去服务并计算结束时间， 建立FINISH类型的事件队列
-                    np.random.shuffle(free_service)
-                    target_service = free_service[0]
+                if target_service is not None:
+                    # 前去服务并计算结束时间， 建立FINISH类型的事件
                     next_finish_time = target_service.dump_and_load(customer)
-                    finish_event = Event(object_=target_service, time=next_finish_time, event_type="FINISH")
-                    self.event_queue.put(finish_event)
-                    debug_print(
-                        "[DEBUG] {:.5f} event add FINISH {:.5f}".format(self.timer.get_time(), next_finish_time))
+                    push(next_finish_time, FINISH, target_service)
+                    if verbose:
+                        debug_print("[DEBUG] {:.5f} event add FINISH {:.5f}", time, next_finish_time)
+                    busy += 1
+                    if store is not None:
+                        store.begin_service[customer.id] = time
+                        store.server_id[customer.id] = target_service.id
+                    if stats is not None:
+                        stats.begin_service(0.0, customer.service)
+                        stats.busy_service.update(time, busy)
                 # 如果当前不存在空闲窗口，则排队(需要检查队列是否已满)
                 else:
                     if len(self.wait_queue) > self.max_queue_length:
-                        debug_print("[WARNING] Waiting queue is full")
+                        if verbose:
+                            debug_print("[WARNING] Waiting queue is full")
+                        if stats is not None:
+                            stats.overflow += 1
+                        if store is not None:
+                            store.balked[customer.id] = True
                     else:
                         customer.enter_queue()
                         self.wait_queue.append(customer)
+                        if store is not None:
+                            store.enter_queue[customer.id] = time
+                        if stats is not None:
+                            stats.queue_length.update(time, len(self.wait_queue))
 
             # 完成服务型 事件
-            elif event.event_type == "FINISH":
-                service = event.get_object()  # 获取事件的服务窗口
+            elif kind == FINISH:
+                service = obj  # 获取事件的服务窗口
+                if store is not None:
+                    store.end_service[service.current_serving.customer.id] = time
                 customer = None if len(self.wait_queue) == 0 else self.wait_queue.pop()  # 获取排在服务队列里的下一个乘客
                 next_finish_time = service.dump_and_load(customer)  # 更换服务对象并算出下一次“FINISH”事件发生的时刻
                 if next_finish_time:
-                    finish_event = Event(object_=service, time=next_finish_time, event_type="FINISH")
-                    self.event_queue.put(finish_event)
-                    debug_print(
-                        "[DEBUG] {:.5f} event add FINISH {:.5f}".format(self.timer.get_time(), next_finish_time))
+                    push(next_finish_time, FINISH, service)
+                    if verbose:
+                        debug_print("[DEBUG] {:.5f} event add FINISH {:.5f}", time, next_finish_time)
+                    if store is not None:
+                        store.begin_service[customer.id] = time
+                        store.server_id[customer.id] = service.id
+                    if stats is not None:
+                        stats.queue_length.update(time, len(self.wait_queue))
+                        stats.begin_service(time - customer.begin_wait_time, customer.service)
+                else:
+                    busy -= 1
+                    if stats is not None:
+                        stats.busy_service.update(time, busy)
 
             else:
-                debug_print("[Error]: Unknown event type %s.".format(event.event_type))
+                debug_print("[Error]: Unknown event type {}.", kind)
+        self.paused = not drain
+
+    def extend(self, n_more):
+        """
+        为 simulate(drain=False) 暂停的仿真追加 n_more 位顾客，随机数流从暂停处继续，
+        之后再次调用 simulate 只需仿真新增的顾客
+        """
+        if not self.paused:
+            raise ValueError("Only a run paused by simulate(drain=False) can be extended.")
+        if self.trace is not None or self.crn:
+            raise ValueError("Trace replay and common random numbers runs cannot be extended.")
+        start = self.number_of_customs
+        self.number_of_customs += n_more
+        self.arrivals.limit = self.number_of_customs
+        if self.streaming:
+            return
+        inter_gen, service_gen = self.generators
+        inter, service = inter_gen.take(n_more), service_gen.take(n_more)
+        if self.store is not None:
+            store = self.store
+            first = store.arrive[start - 1] + store.arrive_inter[start - 1] if start else 0.0
+            store.resize(self.number_of_customs)
+            store.arrive_inter[start:], store.service[start:] = inter, service
+            store.arrive[start:] = first + fifo_arrive_times(inter)
+            return
+        last = self.custom_list[-1] if self.custom_list else None
+        cur_time = last.arrive + last.arrive_inter if last is not None else 0.0
+        for (i, d, s) in zip(range(start, self.number_of_customs), inter.tolist(), service.tolist()):
+            self.custom_list.append(Customer(id=i, timer=self.timer, arrive=cur_time, arrive_inter=d, service=s))
+            cur_time += d
+
+    def __getstate__(self):
+        # 性能探针持有打开的文件，不随检查点保存
+        state = self.__dict__.copy()
+        state["instrument"] = None
+        return state
+
+    def save_checkpoint(self, path):
+        """
+        将仿真的全部状态(时钟、事件队列、等待队列、服务窗口、随机数状态与统计量)保存到文件
+        """
+        with open(path, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load_checkpoint(cls, path):
+        """
+        读取 save_checkpoint 保存的仿真，可直接 extend 后续跑或输出结果
+        """
+        with open(path, "rb") as f:
+            return pickle.load(f)
 
     # 定义report的图表结果部分
-    def report_plot(self):
-        plt.figure(figsize=(12, 15))
-        plt.style.use('seaborn')
-        # 乘客到达时间分布情况
-        plt.subplot(3, 2, 1)
-        plt.xlabel("arrival internal/s")
-        plt.ylabel("number")
-        plt.title("Customer Arrival Internal Time Distribution in {} Customers".format(len(self.custom_list)))
-        arrive_time_list = [custom.arrive_inter for custom in self.custom_list]
-        plt.hist(arrive_time_list)
-
-        # 乘客服务时间分布情况
-        plt.subplot(3, 2, 2)
-        plt.xlabel("service time/s")
-        plt.ylabel("number")
-        plt.title("Customer Service Time Distribution in {} Customers".format(len(self.custom_list)))
-        service_time_list = [custom.service for custom in self.custom_list]
-        plt.hist(service_time_list)
-
-        # 队列平均顾客数
-        plt.subplot(3, 2, 3)
-        plt.xlabel("time")
-        plt.ylabel("average customers in queue")
-        plt.title("Average Number Of Customers in Queue By time")
-        ave_customer = []
-        for i in range(1, int(self.timer.get_time())):
-            ave_customer.append(self.wait_queue.get_ave_wait(time=i))
-        plt.plot(range(1, int(self.timer.get_time())), ave_customer)
-
-        # 服务器平均利用率
-        plt.subplot(3, 2, 4)
-        plt.xlabel("time")
-        plt.ylabel("average usage in queue")
-        plt.title("Average Service Time By time")
-        for service in self.service_list:
-            ave_service = []
-            for i in range(1, int(self.timer.get_time())):
-                ave_service.append(service.get_ave_usage(i))
-            plt.plot(range(1, int(self.timer.get_time())), ave_service)
-
-        # 顾客去留情况
-        if len(self.custom_list) <= 200:
-            plt.subplot(3, 1, 3)
-            plt.title("Served Customers's Distribution By time")
-            for (i, custom) in enumerate(self.custom_list):
-                if custom.begin_service_time:
-                    time_start = int(custom.arrive)
-                    time_end = int(custom.begin_service_time + custom.service)
-                    x = range(time_start, time_end + 1)
-                    y = np.full((time_end - time_start + 1), i + 1)
-                    plt.scatter(x, y)
-                else:
-                    plt.scatter(custom.arrive, i + 1)
-
+    def report_plot(self, path=None, method="minmax"):
+        """
+        画出仿真结果，各面板由 numpy 数组一次画出，长序列按像素数抽稀，见 main.plotting
+        :param path: 输出文件路径(.png、.svg 等)，给出时不经过交互式后端直接写入文件；为 None 时在窗口中显示
+        :param method: 长序列的抽稀方法，"minmax" 或 "lttb"
+        """
+        # 只在需要画图时才导入 matplotlib，批量仿真与命令行入口不必承担其导入开销
+        from main import plotting
+        if path is not None:
+            return plotting.save_report(self, path, method=method)
+        import matplotlib.pyplot as plt
+        with plt.style.context(plotting.style()):
+            fig = plt.figure(figsize=(12, 15))
+            plotting.render_report(self, fig, method=method)
         plt.show()
 
     # 定义report的数值结果部分
-    def report_print(self, is_print=False):
+    def report_print(self, is_print=False, warmup=0):
+        """
+        :param is_print: 是否打印结果
+        :param warmup: 截去的预热期顾客数量，"mser" 表示以 MSER-5 自动检测，截断点记录在 self.warmup 中
+        :return: (被服务顾客的平均逗留时间, 因队列溢出离开的顾客比例)
+        """
+        if warmup:
+            if self.stats is not None:
+                raise ValueError("Warm-up truncation needs per-customer results, which streaming mode does not keep.")
+            sojourn, balked = self.customer_outcomes()
+            if warmup == "mser":
+                # 在被服务顾客的逗留时间序列上检测，再换算为到达顺序中的顾客编号
+                served = np.flatnonzero(~np.isnan(sojourn))
+                cut = mser(sojourn[served])
+                warmup = int(served[cut]) if cut < len(served) else len(sojourn)
+            self.warmup = warmup
+            sojourn, balked = sojourn[warmup:], balked[warmup:]
+            mean_length, no_service = np.nanmean(sojourn), balked.mean()
+            if is_print:
+                print("[REPORT] first {} customers are dropped as warm-up.".format(warmup))
+                print("[REPORT] {}({:.3f}) customers leave due to overflow of queue.".
+                      format(int(balked.sum()), no_service))
+                print("[REPORT] average service process for served customers is {:3f}".format(mean_length))
+            return mean_length, no_service
+        # 流式模式下由在线统计量给出结果
+        if self.stats is not None:
+            mean_length, no_service = self.stats.report()
+            if is_print:
+                print("[REPORT] {}({:.3f}) customers leave due to overflow of queue.".
+                      format(self.stats.overflow, no_service))
+                print("[REPORT] average service process for served customers is {:3f}".format(mean_length))
+            return mean_length, no_service
+        # 快速通道不建立 Customer 对象，由其结果数组计算
+        if self.fifo_result is not None:
+            arrive, service, begin, balked = self.fifo_result
+            mean_length, no_service = fifo_report(arrive, service, begin, balked)
+            if is_print:
+                print("[REPORT] {}({:.3f}) customers leave due to overflow of queue.".
+                      format(int(balked.sum()), no_service))
+                print("[REPORT] average service process for served customers is {:3f}".format(mean_length))
+            return mean_length, no_service
+        if self.store is not None:
+            mean_length, no_service = self.store.report()
+            if is_print:
+                print("[REPORT] {}({:.3f}) customers leave due to overflow of queue.".
+                      format(int(self.store.balked.sum()), no_service))
+                print("[REPORT] average service process for served customers is {:3f}".format(mean_length))
+            return mean_length, no_service
+
         # 乘客平均服务时间
         total_custom = len(self.custom_list)
-        service_custom_list = [custom for custom in self.custom_list if custom.begin_service_time]
+        service_custom_list = [custom for custom in self.custom_list if custom.begin_service_time is not None]
         service_num = len(service_custom_list)
-        no_service_num = total_custom - len(service_custom_list)
+        no_service_num = sum(1 for custom in self.custom_list
+                             if custom.begin_service_time is None and custom.begin_wait_time is None)
         count = 0
         for custom in service_custom_list:
             count += custom.get_wait_length() + custom.service
@@ -186,6 +603,47 @@ class Global:
 
         return count / service_num, no_service_num / total_custom
 
+    def sweep(self, points, engine="event", workers=1, seed=None, replications=1, crn=False, cache=None,
+              curve_times=None):
+        """
+        依次仿真多个参数点
+        :param points: initial_parameters 参数字典的列表
+        :param engine: 仿真引擎，见 run
+        :param workers: 进程数量；为 1 且未指定 seed 时沿用全局随机状态，在当前实例中顺序执行
+        :param seed: 根随机种子，指定后每个(参数点, 重复)使用独立派生的随机数流，结果与进程数量无关
+        :param replications: 每个参数点的重复次数
+        :param crn: 公共随机数模式，第 r 次重复在所有参数点上使用相同的随机数流，见 SweepExecutor
+        :param cache: 结果缓存(main.result_cache.ResultCache)，只有指定 seed 时重复运行才能命中
+        :param curve_times: 时间网格，给出时同时计算该网格上的时间平均曲线，见 time_average_curves
+        :return: 各参数点 (平均逗留时间, 溢出比例) 在重复仿真上的均值列表；
+                 给出 curve_times 时为 (上述列表, 曲线字典)，曲线数组的形状为 (参数点数量, 时间网格长度)，同样为重复仿真上的均值
+        """
+        if (workers == 1 and seed is None and replications == 1 and not crn and cache is None
+                and curve_times is None):
+            results = []
+            for params in points:
+                self.initial_parameters(**params)
+                results.append(self.run(engine))
+            return results
+        if crn and seed is None:
+            seed = np.random.randint(2 ** 31)
+        executor = SweepExecutor(workers=workers, seed=seed, engine=engine, crn=crn, cache=cache,
+                                 curve_times=curve_times)
+        if curve_times is None:
+            return [tuple(value) for value in executor.collect(points, replications).mean(axis=1)]
+        values, curves = executor.collect(points, replications)
+        curves = {name: curve.mean(axis=1) for name, curve in curves.items()}
+        return [tuple(value) for value in values.mean(axis=1)], dict(curves, times=executor.curve_times)
+
+    def adaptive_curve(self, candidates, make_params, budget, point, engine, workers, seed, replications, crn, cache):
+        """
+        以自适应扫描得到一条曲线，见 main.adaptive.adaptive_sweep；budget 为这条曲线的仿真次数上限
+        :return: (已仿真的参数取值列表, 平均逗留时间列表, 溢出比例列表)
+        """
+        x_list, values, _ = adaptive_sweep(candidates, make_params, budget, engine=engine, workers=workers, seed=seed,
+                                           replications=replications, crn=crn, cache=cache, point=point)
+        return x_list, values[:, 0].tolist(), values[:, 1].tolist()
+
     # 任务: 仿真
     def task_simulate(self, x, y, z, m, n):
         self.initial_parameters(x, y, z, m, n)
@@ -196,53 +654,68 @@ class Global:
         self.report_plot()  # 显示可视化结果
 
     # 任务: 调整输入参数的入口 - 平均服务时长
-    def task_parameter_of_service_mean(self, x, service_mean_list, z, m, service_num_list):
-        plt.style.use('seaborn')
+    def task_parameter_of_service_mean(self, x, service_mean_list, z, m, service_num_list, engine="event",
+                                       workers=1, seed=None, replications=1, crn=False, cache=None, budget=None):
+        import matplotlib.pyplot as plt
+        from main import plotting
+        plt.style.use(plotting.style())
         plt.figure(figsize=(10, 6))
 
         # 尝试不同的服务时间对均值的影响
-        list_by_service = []
-        for service_num in service_num_list:
-            mean_length_list = []
-            no_service_list = []
-            for service_mean in service_mean_list:
-                self.initial_parameters(x, service_mean, z, m, service_num)
-                self.service_generate()
-                self.customers_generate()
-                self.simulate()
-                mean_length, no_service = self.report_print()
-                mean_length_list.append(mean_length)
-                no_service_list.append(no_service)
-            list_by_service.append((service_num, mean_length_list, no_service_list))
+        if budget is not None:
+            list_by_service = [(service_num,) + self.adaptive_curve(
+                service_mean_list, lambda service_mean: dict(mean_arrive=x, mean_serve=service_mean, num_custom=z,
+                                                              max_queue=m, num_service=service_num),
+                budget // len(service_num_list), i * len(service_mean_list), engine, workers, seed, replications,
+                crn, cache) for (i, service_num) in enumerate(service_num_list)]
+        else:
+            points = [dict(mean_arrive=x, mean_serve=service_mean, num_custom=z, max_queue=m, num_service=service_num)
+                      for service_num in service_num_list for service_mean in service_mean_list]
+            results = iter(self.sweep(points, engine, workers, seed, replications, crn, cache))
+            list_by_service = []
+            for service_num in service_num_list:
+                mean_length_list = []
+                no_service_list = []
+                for _ in service_mean_list:
+                    mean_length, no_service = next(results)
+                    mean_length_list.append(mean_length)
+                    no_service_list.append(no_service)
+                list_by_service.append((service_num, service_mean_list, mean_length_list, no_service_list))
 
         plt.subplot(1, 2, 1)
         plt.title("Mean Service Length Trend")
-        for (service_num, mean_length_list, no_service_list) in list_by_service:
-            plt.plot(service_mean_list, mean_length_list, label=str(service_num))
+        for (service_num, x_list, mean_length_list, no_service_list) in list_by_service:
+            plt.plot(x_list, mean_length_list, label=str(service_num))
 
         plt.subplot(1, 2, 2)
         plt.title("No Service Trend")
-        for (service_num, mean_length_list, no_service_list) in list_by_service:
-            plt.plot(service_mean_list, no_service_list, label=str(service_num))
+        for (service_num, x_list, mean_length_list, no_service_list) in list_by_service:
+            plt.plot(x_list, no_service_list, label=str(service_num))
 
         plt.legend()
         plt.show()
 
     # 任务: 调整输入参数的入口 - 平均到达时间间隔
-    def task_parameter_of_arrival_mean(self, internal_mean_list, y, z, m, n):
+    def task_parameter_of_arrival_mean(self, internal_mean_list, y, z, m, n, engine="event",
+                                       workers=1, seed=None, replications=1, crn=False, cache=None, budget=None):
         # 尝试不同的服务时间对均值的影响
-        mean_length_list = []
-        no_service_list = []
-        for internal_mean in internal_mean_list:
-            self.initial_parameters(internal_mean, y, z, m, n)
-            self.service_generate()
-            self.customers_generate()
-            self.simulate()
-            mean_length, no_service = self.report_print()
-            mean_length_list.append(mean_length)
-            no_service_list.append(no_service)
-
-        plt.style.use('seaborn')
+        if budget is not None:
+            internal_mean_list, mean_length_list, no_service_list = self.adaptive_curve(
+                internal_mean_list, lambda internal_mean: dict(mean_arrive=internal_mean, mean_serve=y, num_custom=z,
+                                                               max_queue=m, num_service=n),
+                budget, 0, engine, workers, seed, replications, crn, cache)
+        else:
+            points = [dict(mean_arrive=internal_mean, mean_serve=y, num_custom=z, max_queue=m, num_service=n)
+                      for internal_mean in internal_mean_list]
+            mean_length_list = []
+            no_service_list = []
+            for mean_length, no_service in self.sweep(points, engine, workers, seed, replications, crn, cache):
+                mean_length_list.append(mean_length)
+                no_service_list.append(no_service)
+
+        import matplotlib.pyplot as plt
+        from main import plotting
+        plt.style.use(plotting.style())
         plt.figure(figsize=(10, 6))
 
         plt.subplot(1, 2, 1)
@@ -256,34 +729,43 @@ class Global:
         plt.show()
 
     # 任务: 调整输入参数的入口 - 服务窗口数量
-    def task_parameter_of_queue_size(self, x, y, z, queue_size_list, service_num_list):
-        plt.style.use('seaborn')
+    def task_parameter_of_queue_size(self, x, y, z, queue_size_list, service_num_list, engine="event",
+                                     workers=1, seed=None, replications=1, crn=False, cache=None, budget=None):
+        import matplotlib.pyplot as plt
+        from main import plotting
+        plt.style.use(plotting.style())
         plt.figure(figsize=(10, 6))
 
         # 尝试不同的服务时间对均值的影响
-        list_by_service = []
-        for service_num in service_num_list:
-            mean_length_list = []
-            no_service_list = []
-            for queue_size in queue_size_list:
-                self.initial_parameters(x, y, z, queue_size, service_num)
-                self.service_generate()
-                self.customers_generate()
-                self.simulate()
-                mean_length, no_service = self.report_print()
-                mean_length_list.append(mean_length)
-                no_service_list.append(no_service)
-            list_by_service.append((service_num, mean_length_list, no_service_list))
+        if budget is not None:
+            list_by_service = [(service_num,) + self.adaptive_curve(
+                queue_size_list, lambda queue_size: dict(mean_arrive=x, mean_serve=y, num_custom=z,
+                                                         max_queue=queue_size, num_service=service_num),
+                budget // len(service_num_list), i * len(queue_size_list), engine, workers, seed, replications,
+                crn, cache) for (i, service_num) in enumerate(service_num_list)]
+        else:
+            points = [dict(mean_arrive=x, mean_serve=y, num_custom=z, max_queue=queue_size, num_service=service_num)
+                      for service_num in service_num_list for queue_size in queue_size_list]
+            results = iter(self.sweep(points, engine, workers, seed, replications, crn, cache))
+            list_by_service = []
+            for service_num in service_num_list:
+                mean_length_list = []
+                no_service_list = []
+                for _ in queue_size_list:
+                    mean_length, no_service = next(results)
+                    mean_length_list.append(mean_length)
+                    no_service_list.append(no_service)
+                list_by_service.append((service_num, queue_size_list, mean_length_list, no_service_list))
 
         plt.subplot(1, 2, 1)
         plt.title("Mean Service Length Trend")
-        for (service_num, mean_length_list, no_service_list) in list_by_service:
-            plt.plot(queue_size_list, mean_length_list, label=str(service_num))
+        for (service_num, x_list, mean_length_list, no_service_list) in list_by_service:
+            plt.plot(x_list, mean_length_list, label=str(service_num))
 
         plt.subplot(1, 2, 2)
         plt.title("No Service Trend")
-        for (service_num, mean_length_list, no_service_list) in list_by_service:
-            plt.plot(queue_size_list, no_service_list, label=str(service_num))
+        for (service_num, x_list, mean_length_list, no_service_list) in list_by_service:
+            plt.plot(x_list, no_service_list, label=str(service_num))
 
         plt.legend()
         plt.show()
@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+
+from main.analytic import system_capacity
+
+
+def arrival_probabilities(mean_arrive, mean_serve, num_service, capacity):
+    """
+    M/M/c/K 嵌入跳链(只看状态变化的时刻)中各状态下一次事件为到达的概率
+    :return: 长度为 capacity + 1 的数组，状态 0 下一次事件必为到达
+    """
+    lam = 1.0 / mean_arrive
+    mu = 1.0 / mean_serve
+    n = np.arange(capacity + 1)
+    rate = np.minimum(n, num_service) * mu
+    return lam / (lam + rate)
+
+
+def log_scale_factors(up, capacity):
+    """
+    生灭链首达概率的尺度因子 w_m = prod_{i=1..m} (1 - up[i]) / up[i]，m = 0..K-1，取对数以免溢出
+    从 j 人出发先到达满员 K 再清空的概率为 (w_0 + ... + w_{j-1}) / (w_0 + ... + w_{K-1})
+    """
+    return np.concatenate(([0.0], np.cumsum(np.log1p(-up[1:capacity]) - np.log(up[1:capacity]))))
+
+
+def log_hitting_probability(up, capacity):
+    """
+    γ = P(从 1 人出发，在系统清空之前到达满员状态 K) 的对数，γ = 1 / (w_0 + ... + w_{K-1})
+    """
+    return -float(np.logaddexp.reduce(log_scale_factors(up, capacity)))
+
+
+def log_blocked_from_full(up, capacity):
+    """
+    从满员状态 K 出发直到系统清空，被拒绝人数的期望 B 的对数
+    在满员状态每停留一步以概率 up[K] 拒绝一位顾客；离开满员后从 K - 1 回到 K 之前清空的概率为 w_{K-1} / S，
+    S = w_0 + ... + w_{K-1}，因此 B = up[K] S / ((1 - up[K]) w_{K-1})
+    """
+    log_w = log_scale_factors(up, capacity)
+    return float(math.log(up[capacity]) - math.log1p(-up[capacity]) + np.logaddexp.reduce(log_w) - log_w[-1])
+
+
+def log_cycle_arrivals(mean_arrive, mean_serve, num_service, capacity):
+    """
+    每个再生周期内到达人数(含被拒绝的顾客)的期望 A 的对数
+    由 PASTA，到达的顾客看到系统为空的概率为稳态概率 p_0，因此 A = 1 / p_0
+    """
+    n = np.arange(1, capacity + 1)
+    log_ratio = math.log(mean_serve / mean_arrive) - np.log(np.minimum(n, num_service))
+    log_p = np.concatenate(([0.0], np.cumsum(log_ratio)))  # 未归一化的 log p_n
+    return float(np.logaddexp.reduce(log_p))
+
+
+def overflow_probability(mean_arrive, mean_serve, num_service, max_queue):
+    """
+    M/M/c/K 中顾客因队列溢出离开的概率，溢出规则与 Global.simulate 相同，适用于直接仿真几乎观察不到溢出的情形
+    以顾客到达空系统的时刻划分再生周期，由 PASTA 溢出概率 = 每周期被拒绝人数的期望 / 每周期到达人数的期望；
+    被拒绝人数只有在周期内到达满员时才非零，分解为 γ x B / A：
+    γ = 从 1 人出发先到达满员的概率，B = 从满员出发直到清空被拒绝人数的期望，A = 每周期到达人数的期望。
+    三者都由嵌入生灭链在对数空间中直接求出，不需要抽样，任意负载与窗口数量下都是精确值，
+    极小的概率(如 1e-100)也不会下溢。
+    :return: 字典 {"overflow": 溢出概率, "hitting": γ, "blocked": B, "arrivals": A}，各项的对数形式见同名函数
+    """
+    capacity = system_capacity(num_service, max_queue)
+    up = arrival_probabilities(mean_arrive, mean_serve, num_service, capacity)
+    log_hitting = log_hitting_probability(up, capacity)
+    log_blocked = log_blocked_from_full(up, capacity)
+    log_arrivals = log_cycle_arrivals(mean_arrive, mean_serve, num_service, capacity)
+    return {"overflow": math.exp(log_hitting + log_blocked - log_arrivals), "hitting": math.exp(log_hitting),
+            "blocked": math.exp(log_blocked), "arrivals": math.exp(log_arrivals)}
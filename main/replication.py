@@ -0,0 +1,207 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from statistics import NormalDist
+
+import numpy as np
+
+from main.analytic import control_variate
+from main.sweep import SweepExecutor, run_point
+
+
+# 自由度不超过该值时由 t 分布的分布函数精确求分位数，否则使用 Cornish-Fisher 展开
+EXACT_DF = 30
+
+
+def t_two_sided(theta, df):
+    """
+    整数自由度 t 分布的 P(|T| < t)，其中 theta = arctan(t / sqrt(df))(Abramowitz & Stegun 26.7.3、26.7.4)
+    """
+    s, c = math.sin(theta), math.cos(theta)
+    if df % 2:
+        term, total = c, 0.0
+        for k in range(1, (df - 1) // 2 + 1):
+            total += term
+            term *= c * c * (2 * k) / (2 * k + 1)
+        return 2 / math.pi * (theta + s * total)
+    term, total = 1.0, 0.0
+    for k in range(1, df // 2 + 1):
+        total += term
+        term *= c * c * (2 * k - 1) / (2 * k)
+    return s * total
+
+
+@lru_cache(maxsize=256)
+def t_quantile(df, level=0.95):
+    """
+    Student t 分布的双侧分位数
+    自由度不超过 EXACT_DF 时对 t_two_sided 二分求解(精确到浮点精度)；
+    更大的自由度使用 Cornish-Fisher 展开(Abramowitz & Stegun 26.7.5)近似，误差远小于 0.1%
+    :param df: 自由度
+    :param level: 置信水平
+    """
+    if df <= EXACT_DF and df == int(df):
+        lo, hi = 0.0, math.pi / 2
+        for _ in range(100):
+            mid = (lo + hi) / 2
+            if t_two_sided(mid, int(df)) < level:
+                lo = mid
+            else:
+                hi = mid
+        return math.sqrt(df) * math.tan((lo + hi) / 2)
+    z = NormalDist().inv_cdf(0.5 + level / 2)
+    g1 = (z ** 3 + z) / 4
+    g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96
+    g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384
+    g4 = (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160
+    return z + g1 / df + g2 / df ** 2 + g3 / df ** 3 + g4 / df ** 4
+
+
+def confidence_interval(samples, level=0.95):
+    """
+    独立同分布样本均值的置信区间
+    :return: (均值, 半宽)
+    """
+    samples = np.asarray(samples, dtype=float)
+    samples = samples[~np.isnan(samples)]
+    n = len(samples)
+    if n < 2:
+        return (samples.mean() if n else np.nan), np.inf
+    return samples.mean(), t_quantile(n - 1, level) * samples.std(ddof=1) / math.sqrt(n)
+
+
+def is_precise(mean, half_width, rel_precision, abs_precision=0.0):
+    """
+    判断置信区间是否已满足精度要求：半宽不超过 max(相对精度 x |均值|, 绝对精度)
+    """
+    return half_width <= max(rel_precision * abs(mean), abs_precision)
+
+
+def mser(series, batch=5):
+    """
+    MSER-m 预热期检测(m 默认为 5，即 MSER-5)：将观测序列按 batch 个一组取均值，
+    选择使截断后剩余批均值的 SSE / (剩余批数)^2 最小的截断点，只在序列的前一半中搜索
+    :param series: 按时间顺序排列的观测序列，如按到达顺序的逗留时间
+    :return: 应截去的观测数量(batch 的整数倍)
+    """
+    x = np.asarray(series, dtype=float)
+    n = len(x) // batch
+    if n < 2:
+        return 0
+    y = x[:n * batch].reshape(n, batch).mean(axis=1)
+    # 以后缀和一次算出所有截断点的统计量
+    suffix_sum = np.cumsum(y[::-1])[::-1]
+    suffix_sq = np.cumsum((y ** 2)[::-1])[::-1]
+    k = n - np.arange(n)
+    statistic = (suffix_sq - suffix_sum ** 2 / k) / k ** 2
+    return int(np.argmin(statistic[:n // 2 + 1])) * batch
+
+
+class ReplicationRunner:
+    """
+    序贯停止的重复仿真：不断追加独立重复，直到平均逗留时间与溢出比例的置信区间都达到要求的相对半宽，
+    使得远离饱和的参数点很快结束，只有接近饱和的参数点才会用满全部预算。
+    """
+
+    def __init__(self, params, engine="event", seed=None, level=0.95, rel_precision=0.05, abs_precision=1e-3,
+                 min_replications=5, max_replications=200, workers=1, point=0, control_variates=False):
+        """
+        :param params: initial_parameters 的参数字典
+        :param engine: 仿真引擎，见 Global.run
+        :param seed: 根随机种子，第 i 次重复使用 spawn_key=(point, i) 派生的随机数流
+        :param level: 置信水平
+        :param rel_precision: 要求的相对半宽
+        :param abs_precision: 要求的绝对半宽，用于溢出比例接近 0 的情形
+        :param min_replications: 最少重复次数
+        :param max_replications: 最多重复次数
+        :param workers: 进程数量，每轮并行追加 workers 次重复
+        :param point: 参数点序号，用于派生随机数流
+        :param control_variates: 是否以观测到的平均服务时长与平均到达间隔(期望已知)作控制变量缩减方差
+        """
+        self.params = params
+        self.executor = SweepExecutor(workers=workers, seed=seed, engine=engine)
+        self.level = level
+        self.rel_precision = rel_precision
+        self.abs_precision = abs_precision
+        self.min_replications = min_replications
+        self.max_replications = max_replications
+        self.point = point
+        self.control_variates = control_variates
+
+    def run(self):
+        """
+        :return: 字典 {"sojourn": (均值, 半宽), "overflow": (均值, 半宽), "replications": 实际重复次数, "converged": 是否达到精度}
+        """
+        engine, controls = self.executor.engine, self.control_variates
+        if self.executor.workers == 1:
+            return self._run(lambda jobs: [run_point(self.params, seed, engine, controls) for seed in jobs], 1)
+        with ProcessPoolExecutor(max_workers=self.executor.workers) as pool:
+            return self._run(lambda jobs: list(pool.map(run_point, [self.params] * len(jobs), jobs,
+                                                        [engine] * len(jobs), [controls] * len(jobs))),
+                             self.executor.workers or os.cpu_count())
+
+    def _interval(self, values, column):
+        samples = values[:, column]
+        if not self.control_variates:
+            return confidence_interval(samples, self.level)
+        keep = ~np.isnan(samples)
+        if keep.sum() < 4:
+            return confidence_interval(samples, self.level)
+        expected = (self.params.get("mean_serve", 100.0), self.params.get("mean_arrive", 50.0))
+        adjusted, _ = control_variate(samples[keep], values[keep, 2:4], expected)
+        return confidence_interval(adjusted, self.level)
+
+    def _run(self, replicate, step):
+        results = []
+        count = self.min_replications
+        while True:
+            checked = len(results)
+            jobs = [self.executor.job_seed(self.point, r) for r in range(checked, checked + count)]
+            results.extend(replicate(jobs))
+            values = np.array(results)
+            # 按重复顺序逐个检查停止条件，多算出的重复被丢弃，使结果与进程数量无关
+            for n in range(max(checked + 1, self.min_replications), len(results) + 1):
+                sojourn = self._interval(values[:n], 0)
+                overflow = self._interval(values[:n], 1)
+                converged = (is_precise(*sojourn, self.rel_precision) and
+                             is_precise(*overflow, self.rel_precision, self.abs_precision))
+                if converged or n >= self.max_replications:
+                    return {"sojourn": sojourn, "overflow": overflow, "replications": n, "converged": converged}
+            count = min(step, self.max_replications - len(results))
+
+
+def batch_means(global_, params, engine="event", seed=None, batches=20, level=0.95, rel_precision=0.05,
+                abs_precision=1e-3, max_customers=10 ** 7):
+    """
+    批均值法：只做一次长仿真，按到达顺序将顾客分为 batches 批，以各批均值构造置信区间；
+    精度不够时将顾客数量加倍后重新仿真，直到达到精度或超过 max_customers
+    :param global_: 用于仿真的 Global 实例
+    :param params: initial_parameters 的参数字典
+    :return: 字典 {"sojourn": (均值, 半宽), "overflow": (均值, 半宽), "customers": 实际顾客数量, "batches": 批数, "converged": 是否达到精度}
+    """
+    params = dict(params)
+    while True:
+        global_.initial_parameters(**params, seed=seed)
+        global_.run(engine)
+        sojourn, balked = global_.customer_outcomes()
+        sojourn_batches = [np.nanmean(x) if not np.isnan(x).all() else np.nan for x in np.array_split(sojourn, batches)]
+        overflow_batches = [x.mean() for x in np.array_split(balked, batches)]
+        sojourn_ci = confidence_interval(sojourn_batches, level)
+        overflow_ci = confidence_interval(overflow_batches, level)
+        converged = (is_precise(*sojourn_ci, rel_precision) and
+                     is_precise(*overflow_ci, rel_precision, abs_precision))
+        if converged or params["num_custom"] * 2 > max_customers:
+            return {"sojourn": sojourn_ci, "overflow": overflow_ci, "customers": params["num_custom"],
+                    "batches": batches, "converged": converged}
+        params["num_custom"] *= 2
+
+
+def sequential_sweep(points, **kwargs):
+    """
+    对每个参数点分别做序贯停止的重复仿真
+    :param points: initial_parameters 参数字典的列表
+    :param kwargs: 传给 ReplicationRunner 的参数
+    :return: 各参数点 ReplicationRunner.run 的结果列表
+    """
+    return [ReplicationRunner(params, point=i, **kwargs).run() for (i, params) in enumerate(points)]
@@ -0,0 +1,142 @@
+import hashlib
+import inspect
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+# 影响仿真结果的源代码，其内容的哈希作为代码版本计入缓存键，代码改动后旧结果自动失效
+CODE_DIRS = ("event", "object", "time_support")
+CODE_FILES = ("main/preprocess.py", "main/lindley.py", "main/online_stats.py", "main/analytic.py", "main/sweep.py")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@lru_cache(maxsize=1)
+def code_version():
+    """
+    :return: 仿真相关源代码的 sha256
+    """
+    paths = list(CODE_FILES)
+    for directory in CODE_DIRS:
+        paths.extend(os.path.join(directory, name) for name in os.listdir(os.path.join(ROOT, directory))
+                     if name.endswith(".py"))
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(path.encode())
+        with open(os.path.join(ROOT, path), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def canonical_params(params):
+    """
+    补全 initial_parameters 的默认参数，使省略默认值与显式给出默认值得到相同的缓存键
+    """
+    from main.preprocess import Global
+    bound = inspect.signature(Global.initial_parameters).bind(None, **params)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    del arguments["self"], arguments["seed"]
+    return arguments
+
+
+def result_key(engine, params, seed):
+    """
+    结果的内容地址：(引擎, 完整参数(含分布描述), 随机种子, 代码版本) 的 sha256
+    :param seed: numpy.random.SeedSequence 或 int
+    :return: 十六进制字符串；参数中含轨迹回放源等无法确定内容的对象时返回 None，表示不缓存
+    """
+    arguments = canonical_params(params)
+    if arguments.get("trace") is not None:
+        return None
+    seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    text = json.dumps({"engine": engine, "params": arguments, "entropy": str(seed.entropy),
+                       "spawn_key": list(seed.spawn_key), "code": code_version()}, sort_keys=True, default=repr)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    磁盘上按内容寻址的仿真结果缓存
+    每个结果为目录下的一个 .npz 文件，文件名为 result_key，内容为 report_print 的量化结果(metrics)及可选的曲线数组；
+    命中时更新文件的修改时间，总大小超过 max_bytes 时按修改时间淘汰最久未使用的结果(LRU)。
+    """
+
+    def __init__(self, path, max_bytes=1 << 30):
+        """
+        :param path: 缓存目录，不存在时自动创建
+        :param max_bytes: 缓存的最大字节数
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+        self.nbytes = sum(entry.stat().st_size for entry in os.scandir(path) if entry.name.endswith(".npz"))
+        self.hits = 0
+        self.misses = 0
+
+    def __path__(self, key):
+        return os.path.join(self.path, key + ".npz")
+
+    def __contains__(self, key):
+        return key is not None and os.path.exists(self.__path__(key))
+
+    def get(self, key, names=()):
+        """
+        :param names: 结果必须包含的数组名，如曲线名称；缺少时视为未命中
+        :return: 保存的数组字典，未命中时返回 None
+        """
+        if key not in self:
+            self.misses += 1
+            return None
+        path = self.__path__(key)
+        try:
+            with np.load(path) as data:
+                result = {name: data[name] for name in data.files}
+            os.utime(path)
+        except (OSError, ValueError):
+            # 文件已被其他进程淘汰或尚未写完
+            self.misses += 1
+            return None
+        if any(name not in result for name in names):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key, metrics, **curves):
+        """
+        :param metrics: 量化结果，如 (平均逗留时间, 溢出比例)
+        :param curves: 可选的曲线数组，如 Global.time_average_curves 的结果
+        """
+        if key is None:
+            return
+        path = self.__path__(key)
+        # 先写临时文件再改名，读取方不会看到写了一半的文件
+        temp = "{}.{}.tmp".format(path, os.getpid())
+        with open(temp, "wb") as f:
+            np.savez(f, metrics=np.asarray(metrics, dtype=float), **curves)
+        old = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(temp, path)
+        self.nbytes += os.path.getsize(path) - old
+        if self.nbytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """
+        按修改时间从旧到新删除结果，直到总大小不超过 max_bytes
+        """
+        entries = sorted((entry for entry in os.scandir(self.path) if entry.name.endswith(".npz")),
+                         key=lambda entry: entry.stat().st_mtime)
+        self.nbytes = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self.nbytes <= self.max_bytes:
+                break
+            self.nbytes -= entry.stat().st_size
+            os.remove(entry.path)
+
+    def clear(self):
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".npz"):
+                os.remove(entry.path)
+        self.nbytes = 0
@@ -0,0 +1,140 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# Global.time_average_curves 给出的曲线
+CURVES = ("queue", "usage")
+
+
+def run_point(params, seed, engine="event", controls=False, curve_times=None):
+    """
+    在独立的 Global 实例中完成一次仿真，供进程池调用
+    :param params: initial_parameters 的参数字典
+    :param seed: 该次仿真独立的 numpy.random.SeedSequence
+    :param engine: 仿真引擎，见 Global.run
+    :param controls: 是否同时返回控制变量，见 Global.control_statistics
+    :param curve_times: 时间网格，给出时同时返回该网格上的时间平均曲线，见 Global.time_average_curves
+    :return: (被服务顾客的平均逗留时间, 因队列溢出离开的顾客比例)，controls 为 True 时再附加两个控制变量；
+             给出 curve_times 时为 (上述结果, 曲线字典)
+    """
+    from main.preprocess import Global
+    g = Global()
+    g.initial_parameters(**params, seed=seed)
+    mean_length, no_service = g.run(engine)
+    result = (float(mean_length), float(no_service))
+    if controls:
+        result += g.control_statistics()
+    if curve_times is not None:
+        return result, g.time_average_curves(curve_times)
+    return result
+
+
+class SweepExecutor:
+    """
+    参数扫描执行器：将 (参数点 x 重复次数) 的任务分发到进程池中并行执行
+    每个任务的随机数流由根 SeedSequence 以 spawn_key=(参数点序号, 重复序号) 派生，
+    与进程数量及完成顺序无关，因此任意进程数下的结果逐位相同。
+    公共随机数(CRN)模式下随机数流只由重复序号派生，同一次重复在所有参数点上共享随机数，
+    参数点之间的差异几乎不含抽样噪声；基础流缓存在 main.preprocess.BASE_STREAMS 中，每次重复只抽样一次。
+    指定结果缓存时，已缓存的 (参数点, 重复) 直接读取，只计算新的任务，结果由主进程写入缓存。
+    指定 curve_times 时每个任务同时给出该时间网格上的时间平均曲线，曲线与量化结果一起缓存。
+    """
+
+    def __init__(self, workers=1, seed=None, engine="event", crn=False, cache=None, curve_times=None):
+        """
+        :param workers: 进程数量，1 表示在当前进程中顺序执行，None 表示使用全部 CPU
+        :param seed: 根随机种子，为 None 时随机生成(可从 self.seed_sequence.entropy 读回以便复现)
+        :param engine: 仿真引擎，见 Global.run
+        :param crn: 是否使用公共随机数
+        :param cache: 结果缓存，见 main.result_cache.ResultCache，为 None 时不缓存
+        :param curve_times: 时间平均曲线的时间网格，为 None 时只计算量化结果
+        """
+        self.workers = workers
+        self.engine = engine
+        self.crn = crn
+        self.cache = cache
+        self.curve_times = None if curve_times is None else np.asarray(curve_times, dtype=float)
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+    def job_seed(self, point, replication):
+        if self.crn:
+            point = 0
+        return np.random.SeedSequence(self.seed_sequence.entropy,
+                                      spawn_key=tuple(self.seed_sequence.spawn_key) + (point, replication))
+
+    def run(self, points, replications=1, ids=None):
+        """
+        执行扫描，按完成顺序逐个返回结果
+        :param points: initial_parameters 参数字典的列表
+        :param replications: 每个参数点的重复次数
+        :param ids: 派生随机数流所用的参数点编号，默认为参数点在列表中的序号；分批扫描时指定以免不同批次共用随机数流
+        :return: 生成器，元素为 (参数点序号, 重复序号, (平均逗留时间, 溢出比例))；
+                 指定 curve_times 时第三项为 ((平均逗留时间, 溢出比例), 曲线字典)
+        """
+        ids = range(len(points)) if ids is None else ids
+        jobs = [(p, r) for p in range(len(points)) for r in range(replications)]
+        seeds = {(p, r): self.job_seed(ids[p], r) for (p, r) in jobs}
+        if self.crn:
+            # 同一次重复的参数点相邻执行，使基础流在缓存中尽量命中
+            jobs.sort(key=lambda job: job[1])
+            points = [dict(params, crn=True) for params in points]
+        keys = {}
+        if self.cache is not None:
+            from main.result_cache import result_key
+            pending = []
+            for (p, r) in jobs:
+                key = keys[p, r] = result_key(self.engine, points[p], seeds[p, r])
+                cached = self.cache.get(key, () if self.curve_times is None else ("times",) + CURVES)
+                if cached is not None and self.__has_curves__(cached):
+                    metrics = tuple(cached["metrics"].tolist())
+                    if self.curve_times is None:
+                        yield p, r, metrics
+                    else:
+                        yield p, r, (metrics, {name: cached[name] for name in CURVES})
+                else:
+                    pending.append((p, r))
+            jobs = pending
+        for (p, r, value) in self.__execute__(points, jobs, seeds):
+            if self.cache is not None:
+                metrics, curves = (value, {}) if self.curve_times is None else value
+                self.cache.put(keys[p, r], metrics, **curves)
+            yield p, r, value
+
+    def __has_curves__(self, cached):
+        """
+        缓存的曲线是否在所需的时间网格上计算，未要求曲线时总是满足
+        """
+        return self.curve_times is None or np.array_equal(cached["times"], self.curve_times)
+
+    def __execute__(self, points, jobs, seeds):
+        if self.workers == 1:
+            for (p, r) in jobs:
+                yield p, r, run_point(points[p], seeds[p, r], self.engine, curve_times=self.curve_times)
+            return
+        if not jobs:
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(run_point, points[p], seeds[p, r], self.engine,
+                                   curve_times=self.curve_times): (p, r) for (p, r) in jobs}
+            for future in as_completed(futures):
+                p, r = futures[future]
+                yield p, r, future.result()
+
+    def collect(self, points, replications=1, ids=None):
+        """
+        执行扫描并按参数点整理结果
+        :param ids: 派生随机数流所用的参数点编号，见 run
+        :return: 形状为 (参数点数量, 重复次数, 2) 的数组，最后一维为 (平均逗留时间, 溢出比例)；
+                 指定 curve_times 时为 (上述数组, 曲线字典)，曲线数组的形状为 (参数点数量, 重复次数, 时间网格长度)
+        """
+        result = np.empty((len(points), replications, 2))
+        if self.curve_times is None:
+            for p, r, value in self.run(points, replications, ids):
+                result[p, r] = value
+            return result
+        curves = {name: np.empty((len(points), replications, len(self.curve_times))) for name in CURVES}
+        for p, r, (value, curve) in self.run(points, replications, ids):
+            result[p, r] = value
+            for name in CURVES:
+                curves[name][p, r] = curve[name]
+        return result, curves
@@ -1,6 +1,11 @@
 debug = False
 
 
-def debug_print(x):
+def debug_print(x, *args):
+    """
+    调试输出，只有 debug 为 True 时才会格式化字符串
+    :param x: 格式字符串
+    :param args: 格式化参数
+    """
     if debug:
-        print(x)
+        print(x.format(*args) if args else x)
@@ -16,10 +16,10 @@ class Customer:
         self.begin_service_time = None  # optional
 
     def enter_queue(self):
-        self.begin_service_time = self.timer.get_time()
+        self.begin_wait_time = self.timer.get_time()
 
     def begin_service(self):
         self.begin_service_time = self.timer.get_time()
 
     def get_wait_length(self):
-        return self.begin_service_time - self.begin_wait_time if self.begin_wait_time else 0
+        return self.begin_service_time - self.begin_wait_time if self.begin_wait_time is not None else 0
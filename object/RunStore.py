@@ -0,0 +1,175 @@
+import json
+import os
+
+import numpy as np
+
+from time_support.TimeAverageIndex import TimeAverageIndex
+
+# 列名 -> (数据类型, 初始值)，所有列均按顾客编号索引
+COLUMNS = {
+    "arrive": (np.float64, np.nan),  # 到达时刻
+    "arrive_inter": (np.float64, np.nan),  # 与下一位顾客的到达间隔
+    "service": (np.float64, np.nan),  # 服务时长
+    "enter_queue": (np.float64, np.nan),  # 进入等待队列的时刻，未排队为 nan
+    "begin_service": (np.float64, np.nan),  # 开始服务的时刻，未被服务为 nan
+    "end_service": (np.float64, np.nan),  # 结束服务的时刻
+    "server_id": (np.int32, -1),  # 服务窗口编号，未知为 -1
+    "balked": (np.bool_, False),  # 是否因队列溢出离开
+}
+
+
+class RunStore:
+    """
+    列式(struct-of-arrays)的仿真结果存储
+    每一列为按顾客编号索引的预分配 numpy 数组，由事件循环原地填写；
+    可保存为 .npy 目录(加载时内存映射)或 .npz 文件。
+    """
+
+    def __init__(self, num=0, columns=None):
+        """
+        :param num: 顾客数量，按此预分配各列
+        :param columns: 已有的列字典(如加载得到的内存映射数组)，给出时忽略 num
+        """
+        if columns is None:
+            columns = {name: np.full(num, fill, dtype=dtype) for name, (dtype, fill) in COLUMNS.items()}
+        self.columns = columns
+        for name, array in columns.items():
+            setattr(self, name, array)
+
+    def __len__(self):
+        return len(self.arrive)
+
+    def resize(self, num):
+        """
+        将各列扩充到 num 行，新增的行填写初始值，用于续跑时追加顾客
+        """
+        for name, array in list(self.columns.items()):
+            dtype, fill = COLUMNS[name]
+            grown = np.full(num, fill, dtype=dtype)
+            grown[:len(array)] = array[:num]
+            self.columns[name] = grown
+            setattr(self, name, grown)
+
+    # --- 导出与加载 ---
+    def save(self, path):
+        """
+        保存为目录，每列一个 .npy 文件
+        """
+        os.makedirs(path, exist_ok=True)
+        for name, array in self.columns.items():
+            np.save(os.path.join(path, name + ".npy"), array)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"num": len(self), "columns": list(self.columns)}, f)
+
+    def save_npz(self, path):
+        np.savez(path, **self.columns)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """
+        加载 save 保存的目录(各列以内存映射方式打开，不读入内存)或 save_npz 保存的 .npz 文件
+        :param mmap_mode: 传给 numpy.load 的内存映射模式，None 表示完整读入
+        """
+        if os.path.isdir(path):
+            with open(os.path.join(path, "meta.json")) as f:
+                names = json.load(f)["columns"]
+            return cls(columns={name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+                                for name in names})
+        with np.load(path) as data:
+            return cls(columns={name: data[name] for name in data.files})
+
+    # --- 分析 ---
+    def served(self):
+        return ~np.isnan(self.begin_service)
+
+    def sojourn(self):
+        """
+        :return: 每位顾客的逗留时间(等待+服务)，未被服务的顾客为 nan
+        """
+        return self.begin_service - self.arrive + self.service
+
+    def report(self):
+        """
+        :return: 与 Global.report_print 相同的量化结果 (被服务顾客的平均逗留时间, 因队列溢出离开的顾客比例)
+        """
+        served = self.served()
+        return self.sojourn()[served].mean(), self.balked.mean()
+
+    def queue_index(self):
+        """
+        :return: 队列人数的时间平均索引
+        """
+        queued = ~np.isnan(self.enter_queue)
+        return TimeAverageIndex(self.enter_queue[queued], self.begin_service[queued].tolist())
+
+    def usage_index(self, server_id):
+        """
+        :return: 指定服务窗口利用率的时间平均索引
+        """
+        mask = self.server_id == server_id
+        return TimeAverageIndex(self.begin_service[mask], self.end_service[mask].tolist())
+
+    def customer(self, i):
+        return CustomerView(self, i)
+
+
+class CustomerView:
+    """
+    RunStore 中一位顾客的只读视图，提供与 Customer 相同的属性，用于兼容旧的按对象访问的代码
+    """
+
+    def __init__(self, store, i):
+        self.store = store
+        self.id = i
+
+    def _get(self, name):
+        value = self.store.columns[name][self.id]
+        return None if np.isnan(value) else float(value)
+
+    @property
+    def arrive(self):
+        return float(self.store.arrive[self.id])
+
+    @property
+    def arrive_inter(self):
+        return float(self.store.arrive_inter[self.id])
+
+    @property
+    def service(self):
+        return float(self.store.service[self.id])
+
+    @property
+    def begin_wait_time(self):
+        return self._get("enter_queue")
+
+    @property
+    def begin_service_time(self):
+        return self._get("begin_service")
+
+    def get_wait_length(self):
+        return self.begin_service_time - self.begin_wait_time if self.begin_wait_time is not None else 0
+
+
+class CustomerListView:
+    """
+    以 CustomerView 构成的只读顾客列表，替代列式模式下的 custom_list
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [CustomerView(self.store, k) for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("customer index out of range")
+        return CustomerView(self.store, i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield CustomerView(self.store, i)
@@ -1,6 +1,7 @@
 from object.Customer import Customer
 from time_support.Timer import Timer
 from main.utils import debug_print
+from time_support.TimeAverageIndex import TimeAverageIndex
 
 
 class Service:
@@ -8,30 +9,45 @@ class Service:
     服务窗口类
     """
 
-    def __init__(self, id, timer: Timer):
+    def __init__(self, id, timer: Timer, keep_record=True, pool=None, store=None):
         self.id = id
         self.busy = False
         self.current_serving = None
         self.timer = timer  # 计时器
         self.record = []  # 服务记录表
+        self.keep_record = keep_record  # 流式模式与列式模式下不保存服务记录
+        self.store = store  # 列式模式下服务时刻保存在 RunStore 中，见 object.RunStore
+        self.index = None  # 利用率的时间平均索引，记录变化后失效
+        self.busy_time = 0  # 累计服务时间
+        self.pool = pool  # 空闲窗口索引，窗口空闲时放回
+        if pool is not None:
+            pool.release(self)
 
     def isBusy(self):
         return self.busy
 
+    def build_index(self):
+        """
+        由服务记录建立时间平均索引，仿真结束后第一次查询时自动建立；列式模式下由 RunStore 建立
+        """
+        if self.store is not None:
+            self.index = self.store.usage_index(self.id)
+            return self.index
+        if not self.keep_record:
+            # 流式模式下没有记录可建立索引，返回 0 会被误认为真实结果
+            raise RuntimeError("Service records are not kept in streaming mode, use Global.stats.busy_service instead.")
+        self.index = TimeAverageIndex([record.enter_time for record in self.record],
+                                      [record.leave_time for record in self.record])
+        return self.index
+
     def get_ave_usage(self, time):
         """
         生成该服务器的利用率
+        :param time: 指定时刻，可以为 numpy 数组(此时返回整条曲线)
         :return: usage
         """
-        square = 0
-        for record in self.record:
-            if time > record.leave_time:
-                square += (record.leave_time - record.enter_time)
-            elif record.enter_time <= time <= record.leave_time:
-                square += time - record.enter_time
-            else:
-                pass
-        return square / time if time != 0 else 0
+        index = self.index if self.index is not None else self.build_index()
+        return index.average(time)
 
     def dump_and_load(self, customer):
         """
@@ -39,10 +55,12 @@ class Service:
         :param customer: 下一位待服务乘客（None）表示没有了。
         :return: 下一位乘客的预计服务结束时间，若无乘客则返回 None.
         """
+        self.index = None
         # 结束上一个顾客服务（如有）
         if self.current_serving:
             self.current_serving.finish_service(time=self.timer.get_time())
-            debug_print("[DEBUG] {:.5f} customer service finished.".format(self.timer.get_time()))
+            self.busy_time += self.timer.get_time() - self.current_serving.enter_time
+            debug_print("[DEBUG] {:.5f} customer service finished.", self.timer.get_time())
             # 错误检查，服务时间是否对上了
             expected_time = self.current_serving.customer.service + self.current_serving.customer.begin_service_time
             if abs(self.timer.get_time() - expected_time) > 0.00001:
@@ -52,13 +70,16 @@ class Service:
         if not customer:
             self.current_serving = None
             self.busy = False
+            if self.pool is not None:
+                self.pool.release(self)
             return None
         else:
             # 开始服务
             customer.begin_service()
             # 新建一份服务表, 设置为当前服务对象，并加入服务记录中.
             new_record = ServiceRecord(customer=customer, enter_time=self.timer.get_time())
-            self.record.append(new_record)
+            if self.keep_record:
+                self.record.append(new_record)
             self.current_serving = new_record
             self.busy = True
 
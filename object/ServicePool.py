@@ -0,0 +1,62 @@
+import heapq
+from collections import deque
+
+DISPATCH_POLICIES = ("random", "lowest_id", "longest_idle", "least_busy")
+
+
+class ServicePool:
+    """
+    空闲服务窗口索引，由 Service.dump_and_load 在窗口空闲时放回
+    支持的分配策略：
+    random       均匀随机选择一个空闲窗口，O(1)，使用本次仿真的随机数生成器
+    lowest_id    编号最小的空闲窗口，O(log c)
+    longest_idle 空闲时间最长的窗口，O(1)
+    least_busy   累计服务时间最少的窗口，O(log c)
+    """
+
+    def __init__(self, policy="random", rng=None):
+        """
+        :param policy: 分配策略，见 DISPATCH_POLICIES
+        :param rng: numpy.random.Generator，random 策略必须提供
+        """
+        if policy not in DISPATCH_POLICIES:
+            raise ValueError("Unknown dispatch policy {}.".format(policy))
+        if policy == "random" and rng is None:
+            raise ValueError("Random dispatch policy requires a random generator.")
+        self.policy = policy
+        self.rng = rng
+        if policy == "random":
+            self.idle = []  # 空闲窗口列表，取出时与末尾交换后删除
+            self.acquire = self._acquire_random
+            self.release = self.idle.append
+        elif policy == "longest_idle":
+            self.idle = deque()  # 按变为空闲的先后排列
+            self.acquire = self._acquire_longest_idle
+            self.release = self.idle.append
+        else:
+            self.idle = []  # 最小堆
+            self.acquire = self._acquire_heap
+            self.release = self._release_lowest_id if policy == "lowest_id" else self._release_least_busy
+
+    def __len__(self):
+        return len(self.idle)
+
+    def _acquire_random(self):
+        idle = self.idle
+        if not idle:
+            return None
+        k = int(self.rng.integers(len(idle)))
+        idle[k], idle[-1] = idle[-1], idle[k]
+        return idle.pop()
+
+    def _acquire_longest_idle(self):
+        return self.idle.popleft() if self.idle else None
+
+    def _acquire_heap(self):
+        return heapq.heappop(self.idle)[-1] if self.idle else None
+
+    def _release_lowest_id(self, service):
+        heapq.heappush(self.idle, (service.id, service))
+
+    def _release_least_busy(self, service):
+        heapq.heappush(self.idle, (service.busy_time, service.id, service))
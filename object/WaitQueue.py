@@ -1,40 +1,55 @@
-import queue
-
 from object.Customer import Customer
+from time_support.TimeAverageIndex import TimeAverageIndex
 
 
 class WaitQueue:
-    def __init__(self, timer):
+    def __init__(self, timer, keep_record=True, store=None):
         self.timer = timer
         self.queue = []
+        self.keep_record = keep_record  # 流式模式与列式模式下不保存排队记录
+        self.store = store  # 列式模式下排队时刻保存在 RunStore 中，见 object.RunStore
         self.record = []
         self.record_ptr = 0
+        self.index = None  # 时间平均索引，记录变化后失效
 
     def __len__(self):
         return len(self.queue)
 
     def append(self, x: Customer):
         self.queue.append(x)
-        self.record.append(WaitRecord(x, self.timer.get_time()))
+        self.index = None
+        if self.keep_record:
+            self.record.append(WaitRecord(x, self.timer.get_time()))
 
     def pop(self):
-        self.record[self.record_ptr].leave_queue(time=self.timer.get_time())
-        self.record_ptr += 1
+        self.index = None
+        if self.keep_record:
+            self.record[self.record_ptr].leave_queue(time=self.timer.get_time())
+            self.record_ptr += 1
         return self.queue.pop(0)
 
+    def build_index(self):
+        """
+        由排队记录建立时间平均索引，仿真结束后第一次查询时自动建立；列式模式下由 RunStore 建立
+        """
+        if self.store is not None:
+            self.index = self.store.queue_index()
+            return self.index
+        if not self.keep_record:
+            # 流式模式下没有记录可建立索引，返回 0 会被误认为真实结果
+            raise RuntimeError("Queue records are not kept in streaming mode, use Global.stats.queue_length instead.")
+        self.index = TimeAverageIndex([record.enter_time for record in self.record],
+                                      [record.leave_time for record in self.record])
+        return self.index
+
     def get_ave_wait(self, time):
         """
         返回指定时刻的队列平均顾客数量
-        :param time: 指定时刻
+        :param time: 指定时刻，可以为 numpy 数组(此时返回整条曲线)
         :return: [0,time]的队列平均顾客数量
         """
-        square = 0
-        for record in self.record:
-            if record.leave_time < time:
-                square += record.leave_time - record.enter_time
-            elif record.enter_time <= time <= record.leave_time:
-                square += time - record.enter_time
-        return square / time if time > 0 else 0
+        index = self.index if self.index is not None else self.build_index()
+        return index.average(time)
 
 
 class WaitRecord:
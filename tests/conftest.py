@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 仓库没有安装为包，测试从仓库根目录导入 main、object、time_support 等目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
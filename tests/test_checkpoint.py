@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from main.preprocess import Global
+
+MODES = {"list": {}, "columnar": {"columnar": True}, "streaming": {"streaming": True},
+         "least_busy": {"dispatch": "least_busy"}}
+
+
+def start(num_custom, **kwargs):
+    g = Global()
+    g.initial_parameters(mean_arrive=10.0, mean_serve=28.0, num_custom=num_custom, max_queue=6, num_service=3,
+                         seed=17, **kwargs)
+    g.service_generate()
+    g.customers_generate()
+    return g
+
+
+@pytest.mark.parametrize("mode", sorted(MODES))
+def test_checkpoint_and_extend_equals_single_run(mode, tmp_path):
+    full = start(3000, **MODES[mode])
+    full.simulate()
+
+    staged = start(2000, **MODES[mode])
+    staged.simulate(drain=False)
+    path = tmp_path / "run.pkl"
+    staged.save_checkpoint(path)
+    resumed = Global.load_checkpoint(path)
+    resumed.extend(1000)
+    resumed.simulate()
+
+    np.testing.assert_allclose(resumed.report_print(), full.report_print(), rtol=1e-12)
+    if mode != "streaming":
+        np.testing.assert_allclose(resumed.customer_arrays()[3], full.customer_arrays()[3], rtol=1e-12,
+                                   equal_nan=True)
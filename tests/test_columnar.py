@@ -0,0 +1,21 @@
+import numpy as np
+
+from main.preprocess import Global
+
+
+def run(**kwargs):
+    g = Global()
+    g.initial_parameters(num_custom=3000, mean_serve=140, num_service=3, seed=8, **kwargs)
+    metrics = g.run("event")
+    return g, metrics
+
+
+def test_columnar_matches_record_mode():
+    record, record_metrics = run()
+    columnar, columnar_metrics = run(columnar=True)
+    np.testing.assert_allclose(columnar_metrics, record_metrics, rtol=1e-12)
+    times = np.array([100.0, 5000.0, record.timer.get_time()])
+    np.testing.assert_allclose(columnar.wait_queue.get_ave_wait(times), record.wait_queue.get_ave_wait(times))
+    assert columnar.wait_queue.get_ave_wait(times[-1]) > 0
+    for a, b in zip(columnar.service_list, record.service_list):
+        np.testing.assert_allclose(a.get_ave_usage(times), b.get_ave_usage(times))
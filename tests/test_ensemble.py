@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from main.ensemble import ensemble_simulate
+from main.preprocess import Global
+from main.sweep import SweepExecutor
+
+
+@pytest.mark.parametrize("num_service, max_queue, mean_serve", [(1, 5, 9.0), (3, 0, 25.0), (4, 50, 45.0)])
+def test_matches_per_replication_runs(num_service, max_queue, mean_serve):
+    replications, seed, point = 4, 21, 2
+    # chunk 小于顾客人数，覆盖按块抽取随机数的路径
+    result = ensemble_simulate(10.0, mean_serve, 1500, max_queue, num_service, replications, seed=seed, point=point,
+                               chunk=256)
+    executor = SweepExecutor(seed=seed)
+    for r in range(replications):
+        g = Global()
+        g.initial_parameters(10.0, mean_serve, 1500, max_queue, num_service, seed=executor.job_seed(point, r))
+        np.testing.assert_allclose(result[r], g.run("event"), rtol=1e-9)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from main.lindley import fifo_simulate
+from main.preprocess import Global
+
+
+def simulate(engine, num_service, max_queue, rho, seed, num_custom=2000):
+    """
+    :return: (开始服务时刻数组(离开的顾客为 nan), report_print 的量化结果)
+    """
+    g = Global()
+    g.initial_parameters(mean_arrive=10.0, mean_serve=10.0 * rho * num_service, num_custom=num_custom,
+                         max_queue=max_queue, num_service=num_service, seed=seed)
+    metrics = g.run(engine)
+    if engine == "fast":
+        return g.fifo_result[2], metrics
+    begin = np.array([np.nan if custom.begin_service_time is None else custom.begin_service_time
+                      for custom in g.custom_list])
+    return begin, metrics
+
+
+@pytest.mark.parametrize("seed", [1, 7])
+@pytest.mark.parametrize("rho", [0.7, 1.5])
+@pytest.mark.parametrize("max_queue", [0, 3, 1000])
+@pytest.mark.parametrize("num_service", [1, 2, 4])
+def test_fast_path_matches_event_loop(num_service, max_queue, rho, seed):
+    event_begin, event_metrics = simulate("event", num_service, max_queue, rho, seed)
+    fast_begin, fast_metrics = simulate("fast", num_service, max_queue, rho, seed)
+    np.testing.assert_array_equal(np.isnan(event_begin), np.isnan(fast_begin))
+    np.testing.assert_allclose(event_begin, fast_begin, rtol=1e-12, atol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(event_metrics, fast_metrics, rtol=1e-9)
+
+
+def test_single_window_blocks_match_scalar_recursion():
+    # 超过向量化分段长度且溢出稀疏、密集交替出现，覆盖分段提交与逐个递推之间的切换
+    rng = np.random.default_rng(3)
+    n = 200000
+    arrive = np.cumsum(rng.exponential(1.0, n))
+    service = rng.exponential(np.where(np.arange(n) // 20000 % 2, 2.0, 0.8))
+    begin, balked = fifo_simulate(arrive, service, 1, 20)
+    assert balked.any() and not balked.all()
+
+    expected = np.full(n, np.nan)
+    free, pending = 0.0, []
+    for k in range(n):
+        pending = [b for b in pending if b > arrive[k]]
+        if free > arrive[k] and len(pending) > 20:
+            continue
+        expected[k] = max(arrive[k], free)
+        if free > arrive[k]:
+            pending.append(free)
+        free = expected[k] + service[k]
+    np.testing.assert_array_equal(np.isnan(begin), np.isnan(expected))
+    np.testing.assert_allclose(begin, expected, rtol=1e-12, equal_nan=True)
+    np.testing.assert_array_equal(balked, np.isnan(expected))
+
+
+def test_report_print_after_fast_path(capsys):
+    g = Global()
+    g.initial_parameters(num_custom=2000, num_service=2, seed=5)
+    metrics = g.run("fast")
+    assert g.report_print(True) == metrics
+    assert "[REPORT]" in capsys.readouterr().out
+    sojourn, balked = g.customer_outcomes()
+    assert g.report_print(warmup=1) == pytest.approx((np.nanmean(sojourn[1:]), balked[1:].mean()))
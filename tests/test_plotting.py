@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from main.plotting import decimate_minmax, lttb
+
+
+@pytest.mark.parametrize("method", [decimate_minmax, lttb])
+@pytest.mark.parametrize("n", [10, 1200, 1201, 1799, 2399, 100000, 123457])
+@pytest.mark.parametrize("points", [1200, 1000, 7])
+def test_decimation_respects_budget(method, n, points):
+    rng = np.random.default_rng(n)
+    x = np.arange(n, dtype=float)
+    y = rng.normal(size=n)
+    dx, dy = method(x, y, points)
+    assert len(dx) == len(dy) == n if n <= points else len(dx) == len(dy) <= points
+    assert np.all(np.diff(dx) > 0)
+    # 抽稀后的点都取自原序列
+    np.testing.assert_array_equal(dy, y[dx.astype(int)])
+
+
+def test_minmax_keeps_extremes():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=100000)
+    y[[17, 54321, 99999]] = [50.0, -50.0, 60.0]
+    dx, dy = decimate_minmax(np.arange(len(y)), y, 1200)
+    assert {17, 54321, 99999} <= set(dx.astype(int).tolist())
+    assert dy.max() == 60.0 and dy.min() == -50.0
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from time_support.RandomTimeGenerator import RandomTimeGenerator
+
+SPECS = ["exp", "poisson", {"type": "erlang", "k": 3}, {"type": "hyperexp", "scv": 4},
+         {"type": "hyperexp", "probs": [0.2, 0.5, 0.3], "means": [1, 3, 10]}, {"type": "lognormal", "cv": 2},
+         "deterministic", {"type": "empirical", "samples": [1.0, 2.0, 2.5, 7.0]}]
+
+
+def generator(spec, num, seed=11):
+    return RandomTimeGenerator(5.0, num, spec, rng=np.random.default_rng(seed))
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=repr)
+def test_samples_do_not_depend_on_block_size(spec):
+    # next() 按块补充，take(n) 整体抽取，块的长度随 num 变化；同一条流上三者应得到相同的样本
+    n = 3000
+    whole = generator(spec, n).take(n)
+    small = generator(spec, 100)
+    stepped = np.array([small.next() for _ in range(n)])
+    mixed = generator(spec, 70)
+    parts = [np.array([mixed.next() for _ in range(5)]), mixed.take(1000), np.array([mixed.next()]), mixed.take(1994)]
+    np.testing.assert_allclose(stepped, whole, rtol=1e-12)
+    np.testing.assert_allclose(np.concatenate(parts), whole, rtol=1e-12)
+
+
+@pytest.mark.parametrize("spec", SPECS[:-1], ids=repr)
+def test_mean(spec):
+    samples = generator(spec, 200000).take(200000)
+    assert abs(samples.mean() - 5.0) < 0.1
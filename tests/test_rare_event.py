@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+from main.analytic import mmck
+from main.preprocess import Global
+from main.rare_event import overflow_probability
+
+CASES = [
+    (1.0, 0.5, 1, 80),
+    (1.0, 0.9, 1, 40),
+    (1.0, 3.0, 4, 20),
+    (1.0, 0.5, 3, -1),
+    # 多窗口：死亡率随人数变化，逐状态交换到达与离开概率的重要性抽样在这里严重低估
+    (1.0, 10.0, 16, 20),
+    (1.0, 2.0, 64, 10),
+    # 负载 >= 1
+    (1.0, 1.5, 1, 20),
+    (1.0, 1.0, 1, 200),
+    (1.0, 10.0, 2, 100),
+]
+
+
+@pytest.mark.parametrize("params", CASES)
+def test_matches_analytic(params):
+    start = time.perf_counter()
+    result = overflow_probability(*params)
+    assert time.perf_counter() - start < 1
+    assert result["overflow"] == pytest.approx(mmck(*params)["overflow"], rel=1e-9)
+
+
+def test_many_windows():
+    assert overflow_probability(1.0, 10.0, 16, 20)["overflow"] == pytest.approx(1.11e-6, rel=0.01)
+
+
+def test_far_below_double_precision_of_direct_simulation():
+    result = overflow_probability(1.0, 0.2, 1, 150)
+    assert 0 < result["overflow"] < 1e-100
+    assert result["overflow"] == pytest.approx(mmck(1.0, 0.2, 1, 150)["overflow"], rel=1e-9)
+
+
+def test_default_parameters():
+    g = Global()
+    g.initial_parameters(seed=1)
+    assert g.rare_overflow()["overflow"] == pytest.approx(g.analytic()["overflow"], rel=1e-12)
@@ -0,0 +1,22 @@
+import pytest
+
+from main.replication import confidence_interval, t_quantile
+
+# 常用的 t 分布双侧分位数表
+TABLE = {
+    0.95: {1: 12.7062, 2: 4.3027, 3: 3.1824, 4: 2.7764, 5: 2.5706, 10: 2.2281, 30: 2.0423, 60: 2.0003, 120: 1.9799},
+    0.99: {1: 63.6567, 2: 9.9248, 3: 5.8409, 10: 3.1693, 30: 2.7500, 60: 2.6603},
+    0.90: {1: 6.3138, 2: 2.9200, 5: 2.0150, 30: 1.6973},
+}
+
+
+@pytest.mark.parametrize("level, df, expected", [(level, df, x) for level, row in TABLE.items()
+                                                 for df, x in row.items()])
+def test_t_quantile_matches_table(level, df, expected):
+    assert t_quantile(df, level) == pytest.approx(expected, abs=1e-4)
+
+
+def test_two_replications_use_exact_quantile():
+    mean, half_width = confidence_interval([1.0, 3.0])
+    assert mean == 2.0
+    assert half_width == pytest.approx(12.7062, abs=1e-4)
@@ -0,0 +1,23 @@
+import pytest
+
+from main.preprocess import Global
+
+
+def test_time_averages_are_not_silently_zero():
+    g = Global()
+    g.initial_parameters(num_custom=2000, num_service=2, seed=3, streaming=True)
+    g.run("event")
+    with pytest.raises(RuntimeError, match="Global.stats"):
+        g.wait_queue.get_ave_wait(100.0)
+    with pytest.raises(RuntimeError, match="Global.stats"):
+        g.service_list[0].get_ave_usage(100.0)
+    assert g.stats.summary(g.timer.get_time())["ave_queue_length"] > 0
+
+
+def test_streaming_matches_record_mode():
+    results = []
+    for streaming in (False, True):
+        g = Global()
+        g.initial_parameters(num_custom=2000, num_service=2, seed=3, streaming=streaming)
+        results.append(g.run("event"))
+    assert results[1] == pytest.approx(results[0], rel=1e-12)
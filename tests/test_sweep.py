@@ -0,0 +1,13 @@
+import numpy as np
+
+from main.sweep import SweepExecutor
+
+POINTS = [dict(num_custom=400, mean_serve=80, num_service=1), dict(num_custom=400, mean_serve=150, num_service=2)]
+
+
+def test_results_do_not_depend_on_workers():
+    sequential = SweepExecutor(workers=1, seed=12).collect(POINTS, replications=2)
+    parallel = SweepExecutor(workers=2, seed=12).collect(POINTS, replications=2)
+    np.testing.assert_array_equal(sequential, parallel)
+    # 不同参数点与不同重复使用不同的随机数流
+    assert len(np.unique(sequential[..., 0])) == sequential[..., 0].size
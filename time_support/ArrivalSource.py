@@ -0,0 +1,73 @@
+from object.Customer import Customer
+
+# 按块读取列式存储或轨迹时每块的顾客数量
+BLOCK = 1 << 16
+
+
+class ArrivalSource:
+    """
+    按到达顺序逐个给出顾客的数据源
+    以下标而不是生成器记录进度，可以随 Global 一起 pickle，从而支持断点保存与续跑；
+    limit 可以在暂停后增大，使仿真继续生成后续顾客。
+    顾客取自以下之一：customers(已生成的顾客列表)、store(列式存储)、trace(轨迹回放源)、
+    generators(到达间隔与服务时长生成器，流式模式下逐个生成)
+    """
+
+    def __init__(self, timer, limit, customers=None, store=None, trace=None, generators=None, record=None,
+                 block=BLOCK):
+        """
+        :param timer: 全局计时器
+        :param limit: 顾客总数
+        :param record: 轨迹回放时逐个追加顾客的列表，为 None 时不保存
+        :param block: 按块读取的顾客数量
+        """
+        self.timer = timer
+        self.limit = limit
+        self.customers = customers
+        self.store = store
+        self.trace = trace
+        self.generators = generators
+        self.record = record
+        self.block = block
+        self.index = 0  # 下一位顾客的编号
+        self.time = 0.0  # 逐个生成时下一位顾客的到达时刻
+        self.buffer = []  # 当前块的 (到达时刻, 到达间隔, 服务时长)
+        self.start = 0  # 当前块第一位顾客的编号
+
+    def __len__(self):
+        return self.limit
+
+    def next(self):
+        """
+        :return: 下一位顾客，已取完时返回 None
+        """
+        i = self.index
+        if i >= self.limit:
+            return None
+        self.index = i + 1
+        if self.customers is not None:
+            return self.customers[i]
+        if self.generators is not None:
+            inter_gen, service_gen = self.generators
+            inter = inter_gen.next()
+            customer = Customer(id=i, timer=self.timer, arrive=self.time, arrive_inter=inter,
+                                service=service_gen.next())
+            self.time += inter
+            return customer
+        if i - self.start >= len(self.buffer):
+            self.__fill__(i)
+        arrive, inter, service = self.buffer[i - self.start]
+        customer = Customer(id=i, timer=self.timer, arrive=arrive, arrive_inter=inter, service=service)
+        if self.record is not None:
+            self.record.append(customer)
+        return customer
+
+    def __fill__(self, i):
+        j = min(self.limit, i + self.block)
+        if self.store is not None:
+            store = self.store
+            columns = (store.arrive[i:j], store.arrive_inter[i:j], store.service[i:j])
+        else:
+            columns = self.trace.block(i, j)
+        self.buffer = list(zip(*(column.tolist() for column in columns)))
+        self.start = i
@@ -0,0 +1,73 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+
+class BaseStreamCache:
+    """
+    公共随机数(CRN)模式下的基础随机数流缓存
+    基础流为均值为 1 的样本数组，各参数点按自身均值缩放后使用，因此同一次重复在不同参数点上只需抽样一次。
+    内存中按最近使用顺序(LRU)保存，总大小超过 max_bytes 时淘汰最久未使用的数组；
+    指定 spill_dir 时被淘汰的数组写入磁盘，之后以内存映射方式读回，多个进程也可共享同一目录。
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20, spill_dir=None):
+        """
+        :param max_bytes: 内存中缓存的最大字节数
+        :param spill_dir: 溢出目录，为 None 时被淘汰的数组直接丢弃
+        """
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __path__(self, key):
+        name = hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+        return os.path.join(self.spill_dir, name + ".npy")
+
+    def get(self, key, factory):
+        """
+        :param key: 可哈希且 repr 稳定的键，如 (种子, 流序号, 分布, 数量)
+        :param factory: 缓存未命中时调用 factory() 生成数组
+        :return: 只读的 numpy 数组
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        if self.spill_dir is not None and os.path.exists(self.__path__(key)):
+            self.hits += 1
+            array = np.load(self.__path__(key), mmap_mode="r")
+        else:
+            self.misses += 1
+            array = np.asarray(factory(), dtype=float)
+            array.flags.writeable = False
+        self.__put__(key, array)
+        return array
+
+    def __put__(self, key, array):
+        self.entries[key] = array
+        self.nbytes += array.nbytes
+        # 至少保留刚放入的数组
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            old_key, old = self.entries.popitem(last=False)
+            self.nbytes -= old.nbytes
+            if self.spill_dir is not None and not isinstance(old, np.memmap):
+                os.makedirs(self.spill_dir, exist_ok=True)
+                path = self.__path__(old_key)
+                if not os.path.exists(path):
+                    # 先写临时文件再改名，避免其他进程读到写了一半的文件
+                    temp = "{}.{}.npy".format(path[:-4], os.getpid())
+                    np.save(temp, old)
+                    os.replace(temp, path)
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
@@ -1,50 +1,156 @@
+import math
+
 import numpy as np
-import random
+
+# 每次补充的随机数块的最大长度
+MAX_BLOCK = 1 << 16
+DISTRIBUTIONS = ("exp", "poisson", "erlang", "hyperexp", "lognormal", "deterministic", "empirical")
+
+
+def is_scale_family(spec):
+    """
+    是否为尺度族：均值为 1 的样本乘以 mean 即与均值为 mean 的样本同分布，公共随机数模式据此复用基础流
+    """
+    return parse_spec(spec)[0] != "poisson"
+
+
+def parse_spec(spec):
+    """
+    解析分布描述：可以是分布名称字符串，如 "exp"，也可以是带参数的字典，如 {"type": "erlang", "k": 3}
+    :return: (分布名称, 参数字典)
+    """
+    if isinstance(spec, str):
+        return spec, {}
+    params = dict(spec)
+    return params.pop("type"), params
 
 
 class RandomTimeGenerator:
     """
     随机时间生成器
-    @拓展：
-    1. 多类随机分布生成器
+    基于 numpy.random.Generator，按固定长度的块按需补充随机数：next() 逐个取用，take(n) 一次取出整个数组供向量化计算使用。
+    所有分布均以 mean 为均值(poisson 除外均为尺度族)，形状由额外参数给出：
+    exp           指数分布
+    poisson       泊松分布
+    erlang        k 阶 Erlang 分布，参数 k (默认 2)
+    hyperexp      超指数分布，参数 probs 与 means(各分支均值的相对大小)，或只给出平方变异系数 scv (默认 4，平衡均值的两阶超指数)
+    lognormal     对数正态分布，参数 cv 变异系数 (默认 1)
+    deterministic 常数 mean
+    empirical     经验分布的逆 CDF 插值，参数 samples(样本) 或 cdf=(取值, 累积概率)；按 mean 缩放，mean 为 None 时保持原值
     """
 
-    def __init__(self, mean, num, dis_type, shuffle=True):
+    def __init__(self, mean, num, dis_type, shuffle=True, rng=None, **params):
+        """
+        :param mean: 均值
+        :param num: 预计取用的数量，决定每块的长度(不超过 MAX_BLOCK)，取用超过 num 时自动补充
+        :param dis_type: 分布名称或分布描述字典，见 parse_spec
+        :param shuffle: 为兼容保留；各随机数独立同分布，打乱顺序没有意义
+        :param rng: numpy.random.Generator，为 None 时由全局随机状态派生一个
+        :param params: 分布的形状参数
+        """
+        dis_type, spec_params = parse_spec(dis_type)
+        if dis_type not in DISTRIBUTIONS:
+            raise ValueError("Unknown random distribution {}.".format(dis_type))
+        spec_params.update(params)
         self.mean = mean
         self.num = num
-        self.pointer = 0
-        self.random_candidate = self.__random_sample__(mean, num, dis_type, shuffle)
         self.dis_type = dis_type
+        self.params = spec_params
         self.shuffle = shuffle
+        self.rng = rng if rng is not None else np.random.default_rng(np.random.randint(2 ** 31))
+        self.block = int(min(max(num, 1), MAX_BLOCK))
+        self.sampler = self.__build_sampler__(mean, dis_type, spec_params)
+        self.random_candidate = np.empty(0)  # 当前块
+        self.candidate_list = []  # 当前块的 list 形式，供 next() 快速取用
+        self.pointer = 0
 
-    @staticmethod
-    def __random_sample__(mean, num, dis_type, shuffle=True):
+    def __build_sampler__(self, mean, dis_type, params):
         """
-        根据平均数和数量生成指定的随机数备选列表，这样做的目的是为了使得随机数尽可能接近均值
-        :param mean: 均值
-        :param num: 数量
-        :param dis_type: 分布选择
-        :return: 随机数备选列表
-        """
-        if dis_type == "poisson":
-            distribution = np.random.poisson(mean, num)
-            if shuffle:
-                random.shuffle(distribution)
-            return distribution
-        elif dis_type == "exp":
-            distribution = np.random.exponential(mean, num)
-            if shuffle:
-                random.shuffle(distribution)
-            return distribution
+        根据分布生成抽样函数 sampler(n) -> numpy 数组
+        """
+        rng = self.rng
+        if dis_type == "exp":
+            return lambda n: rng.exponential(mean, n)
+        elif dis_type == "poisson":
+            return lambda n: rng.poisson(mean, n).astype(float)
+        elif dis_type == "erlang":
+            k = params.get("k", 2)
+            return lambda n: rng.gamma(k, mean / k, n)
+        elif dis_type == "hyperexp":
+            if "probs" in params:
+                probs = np.asarray(params["probs"], dtype=float)
+                means = np.asarray(params["means"], dtype=float)
+            else:
+                scv = params.get("scv", 4.0)
+                if scv < 1:
+                    raise ValueError("Hyperexponential distribution requires scv >= 1.")
+                p = (1 + math.sqrt((scv - 1) / (scv + 1))) / 2
+                probs = np.array([p, 1 - p])
+                means = np.array([1 / (2 * p), 1 / (2 * (1 - p))])
+            probs = probs / probs.sum()
+            means = means * mean / (probs * means).sum()
+            edges = np.cumsum(probs)[:-1]
+
+            # 每个样本连续取两个均匀随机数，分别用于选择分支与逆变换抽取指数分布，
+            # 样本只依赖于它在流中的位置，与按块抽取的方式无关
+            def hyperexp(n):
+                u = rng.random((n, 2))
+                return -np.log1p(-u[:, 1]) * means[np.searchsorted(edges, u[:, 0], side="right")]
+            return hyperexp
+        elif dis_type == "lognormal":
+            sigma2 = math.log(1 + params.get("cv", 1.0) ** 2)
+            mu = math.log(mean) - sigma2 / 2
+            return lambda n: rng.lognormal(mu, math.sqrt(sigma2), n)
+        elif dis_type == "deterministic":
+            return lambda n: np.full(n, float(mean))
         else:
-            print("[ERROR] Unknown random distribution.")
+            if "cdf" in params:
+                values, probs = (np.asarray(x, dtype=float) for x in params["cdf"])
+            else:
+                values = np.sort(np.asarray(params["samples"], dtype=float))
+                probs = np.linspace(0, 1, len(values))
+            # 分段线性逆 CDF 的均值：概率为 probs[0] 的原子 values[0] 加上各段的梯形面积
+            table_mean = probs[0] * values[0] + (np.diff(probs) * (values[1:] + values[:-1]) / 2).sum()
+            scale = 1.0 if mean is None else mean / table_mean
+            return lambda n: np.interp(rng.random(n), probs, values) * scale
+
+    def __getstate__(self):
+        # 抽样函数为闭包，不能序列化；反序列化后由分布参数与恢复的 rng 重新构造
+        state = self.__dict__.copy()
+        del state["sampler"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.sampler = self.__build_sampler__(self.mean, self.dis_type, self.params)
+
+    def sample(self, n):
+        """
+        直接抽取 n 个随机数，不经过缓冲块
+        """
+        return self.sampler(n)
+
+    def __refill__(self):
+        self.random_candidate = self.sampler(self.block)
+        self.candidate_list = self.random_candidate.tolist()
+        self.pointer = 0
 
     def next(self):
-        # 若取出的次数超过预先约定的数量，会警告并生成新的一批备选值
-        if self.pointer >= self.num:
-            print("[WARNING]: times of next call exceed predefined number.")
-            self.pointer = 0
-            self.random_candidate = self.__random_sample__(self.mean, self.num, self.dis_type, self.shuffle)
-        temp = self.random_candidate[self.pointer]
+        # 当前块取完后自动补充新的一块
+        if self.pointer >= len(self.candidate_list):
+            self.__refill__()
+        temp = self.candidate_list[self.pointer]
         self.pointer += 1
         return temp
+
+    def take(self, n):
+        """
+        一次取出 n 个随机数，供向量化计算使用：先取完当前块的剩余部分，其余直接整体抽取
+        :param n: 数量
+        :return: numpy 数组
+        """
+        rest = self.random_candidate[self.pointer:self.pointer + n]
+        self.pointer += len(rest)
+        if len(rest) == n:
+            return rest
+        return np.concatenate((rest, self.sampler(n - len(rest))))
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class TimeAverageIndex:
+    """
+    阶梯函数的时间平均索引
+    由若干 [进入时刻, 离开时刻) 区间叠加得到阶梯函数(如队列人数、窗口是否忙碌)，
+    预先计算排序后的断点与累积面积，任意时刻的积分/时间平均只需一次二分查找。
+    离开时刻为 None 的区间视为一直持续到仿真结束之后。
+    """
+
+    def __init__(self, enter, leave):
+        enter = np.asarray(enter, dtype=float)
+        leave = np.array([np.inf if x is None else x for x in leave], dtype=float)
+        leave = leave[np.isfinite(leave)]
+        times = np.concatenate((enter, leave))
+        delta = np.concatenate((np.ones(len(enter)), -np.ones(len(leave))))
+        order = np.argsort(times, kind="stable")
+        self.times = times[order]  # 断点
+        self.level = np.cumsum(delta[order])  # 各断点之后的函数值
+        self.area = np.zeros(len(self.times))  # 各断点处的累积面积
+        if len(self.times) > 1:
+            np.cumsum(self.level[:-1] * np.diff(self.times), out=self.area[1:])
+
+    def integral(self, time):
+        """
+        阶梯函数在 [0, time] 上的积分
+        :param time: 指定时刻，可以为 numpy 数组
+        """
+        time = np.asarray(time, dtype=float)
+        if len(self.times) == 0:
+            return np.zeros(time.shape)
+        idx = np.searchsorted(self.times, time, side="right") - 1
+        safe = np.maximum(idx, 0)
+        value = self.area[safe] + self.level[safe] * (time - self.times[safe])
+        return np.where(idx < 0, 0.0, value)
+
+    def average(self, time):
+        """
+        阶梯函数在 [0, time] 上的时间平均，time 为 0 时返回 0
+        :param time: 指定时刻，可以为 numpy 数组(此时返回整条曲线)
+        """
+        time = np.asarray(time, dtype=float)
+        square = self.integral(time)
+        result = np.divide(square, time, out=np.zeros(time.shape), where=time > 0)
+        return float(result) if result.ndim == 0 else result
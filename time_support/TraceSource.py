@@ -0,0 +1,119 @@
+import os
+
+import numpy as np
+
+# 每次从轨迹文件中读取的行数
+CHUNK = 1 << 16
+
+
+class TraceSource:
+    """
+    真实到达/服务轨迹的回放源
+    轨迹文件为 (到达时刻, 服务时长) 两列 float64，按到达时刻非降序排列，可以是 .npy 文件或无文件头的二进制文件；
+    文件以内存映射方式打开，仿真时按块读取，不会整体读入内存。
+    支持按时间窗口截取与回放速度缩放：回放时刻 = (到达时刻 - 窗口起点) / speed。
+    """
+
+    def __init__(self, path, start=None, end=None, speed=1.0, service_scale=1.0, chunk=CHUNK):
+        """
+        :param path: 轨迹文件路径，.npy 或原始 float64 二进制文件
+        :param start: 时间窗口起点(轨迹时间)，None 表示从头开始
+        :param end: 时间窗口终点(不含)，None 表示到结尾
+        :param speed: 回放速度，大于 1 时到达更密集，即负载按比例放大
+        :param service_scale: 服务时长的缩放系数
+        :param chunk: 每次读取的行数
+        """
+        self.path = path
+        self.data = self.__open__(path)
+        arrive = self.data[:, 0]
+        self.lo = 0 if start is None else int(np.searchsorted(arrive, start, side="left"))
+        self.hi = len(self.data) if end is None else int(np.searchsorted(arrive, end, side="left"))
+        self.origin = start if start is not None else (float(arrive[self.lo]) if self.hi > self.lo else 0.0)
+        self.speed = speed
+        self.service_scale = service_scale
+        self.chunk = chunk
+
+    @staticmethod
+    def __open__(path):
+        if path.endswith(".npy"):
+            return np.load(path, mmap_mode="r")
+        return np.memmap(path, dtype=np.float64, mode="r").reshape(-1, 2)
+
+    def __getstate__(self):
+        # 序列化时只保存文件路径，反序列化后重新映射，不复制轨迹数据
+        state = self.__dict__.copy()
+        del state["data"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.data = self.__open__(self.path)
+
+    def __len__(self):
+        return max(0, self.hi - self.lo)
+
+    def chunks(self):
+        """
+        按块给出回放数据
+        :return: 生成器，元素为 (到达时刻, 与下一位顾客的到达间隔, 服务时长) 三个数组；最后一位顾客的间隔为 0
+        """
+        for i in range(0, len(self), self.chunk):
+            yield self.block(i, min(len(self), i + self.chunk))
+
+    def block(self, i, j):
+        """
+        取出窗口内第 i 至 j-1 位顾客的回放数据
+        :return: (到达时刻, 与下一位顾客的到达间隔, 服务时长) 三个数组；窗口内最后一位顾客的间隔为 0
+        """
+        i, j = self.lo + i, self.lo + j
+        # 多读一行以得到块内最后一位顾客的到达间隔
+        block = np.array(self.data[i:min(self.hi, j + 1)])
+        arrive = (block[:, 0] - self.origin) / self.speed
+        inter = np.zeros(j - i)
+        inter[:len(arrive) - 1] = np.diff(arrive)
+        return arrive[:j - i], inter, block[:j - i, 1] * self.service_scale
+
+    def arrays(self):
+        """
+        一次取出整个窗口的数据，供快速通道等向量化计算使用
+        :return: (到达时刻, 到达间隔, 服务时长)
+        """
+        parts = list(self.chunks())
+        if not parts:
+            return np.empty(0), np.empty(0), np.empty(0)
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    @staticmethod
+    def from_csv(csv_path, npy_path, delimiter=",", skip_header=0, usecols=(0, 1), chunk=1 << 20):
+        """
+        将 CSV 轨迹一次性转换为 .npy 文件：先统计行数，再按块写入内存映射的输出文件，内存占用与文件大小无关
+        :param csv_path: CSV 文件路径，每行为 到达时刻, 服务时长
+        :param npy_path: 输出的 .npy 文件路径
+        :param skip_header: 跳过的表头行数
+        :param usecols: 到达时刻与服务时长所在的列
+        :return: 打开该文件的 TraceSource
+        """
+        with open(csv_path) as f:
+            rows = sum(1 for line in f if line.strip()) - skip_header
+        out = np.lib.format.open_memmap(npy_path, mode="w+", dtype=np.float64, shape=(rows, 2))
+        with open(csv_path) as f:
+            for _ in range(skip_header):
+                next(f)
+            filled = 0
+            last = -np.inf
+            while filled < rows:
+                lines = [line for line in (f.readline() for _ in range(chunk)) if line.strip()]
+                if not lines:
+                    break
+                block = np.loadtxt(lines, delimiter=delimiter, usecols=usecols, ndmin=2)
+                # 逐块检查到达时刻是否有序
+                if block[0, 0] < last or np.any(np.diff(block[:, 0]) < 0):
+                    del out
+                    os.remove(npy_path)
+                    raise ValueError("Trace arrivals must be sorted by time.")
+                last = block[-1, 0]
+                out[filled:filled + len(block)] = block
+                filled += len(block)
+        out.flush()
+        del out
+        return TraceSource(npy_path)